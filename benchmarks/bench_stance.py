@@ -0,0 +1,338 @@
+"""
+    Stance extraction benchmarks
+
+    Plays deterministic synthetic games, in which every power gives seeded random legal orders,
+    and replays each one calling get_stance after every phase, as a bot would.
+    The latency of every call and its peak memory are measured for each model and mode,
+    and written as JSON along with the environment, e.g.
+        python benchmarks/bench_stance.py --output results.json
+    The results can be compared against a stored baseline, exiting with status 1
+    if a latency or peak memory grew beyond the tolerance:
+        python benchmarks/bench_stance.py --output new.json --baseline results.json
+
+"""
+
+import argparse
+import importlib.util
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from diplomacy import Game
+
+from stance_vector import ActionBasedStance, ScoreBasedStance, maps
+from stance_vector.orders import _build_order_table
+from stance_vector.stance_extraction import StanceExtraction
+
+DEFAULT_PHASES = (10, 50, 100, 200)
+DEFAULT_MAPS = ("standard",)
+DEFAULT_SEED = 0
+DEFAULT_REPEAT = 3
+# relative growth of a latency or peak memory reported as a regression
+DEFAULT_TOLERANCE = 0.2
+
+
+class Mode(NamedTuple):
+    """
+    A stance model and the options it is benchmarked with
+        name: the name of the mode in the results
+        model: the model class
+        options: the keyword arguments of the model
+        verbose: whether get_stance also renders the log of the update
+    """
+
+    name: str
+    model: Callable[..., StanceExtraction]
+    options: Dict[str, Any]
+    verbose: bool = False
+
+
+MODES = (
+    Mode("action", ActionBasedStance, {}),
+    Mode("action-verbose", ActionBasedStance, {}, verbose=True),
+    Mode("action-deepcopy", ActionBasedStance, {"deepcopy_game": True}),
+    Mode("action-incremental", ActionBasedStance, {"incremental": True}),
+    Mode("action-ego", ActionBasedStance, {"ego_only": True}),
+    Mode("action-numpy", ActionBasedStance, {"numpy_engine": True}),
+    Mode("score", ScoreBasedStance, {}),
+)
+# copying the whole game on every call takes orders of magnitude longer than the other modes
+DEFAULT_MODES = tuple(mode for mode in MODES if mode.name != "action-deepcopy")
+
+
+def make_game(phases: int, seed: int, map_name: str = "standard") -> Game:
+    """
+    Play a synthetic game in which every power gives random legal orders
+        phases: the number of phases to process, fewer if the game ends before
+        seed: the seed of the orders, the same seed giving the same game
+        map_name: the map of the game
+    """
+    rng = random.Random(seed)
+    game = Game(map_name=map_name)
+    while len(game.state_history) < phases and not game.is_game_done:
+        possible_orders = game.get_all_possible_orders()
+        for power_name in sorted(game.powers):
+            locs = sorted(game.get_orderable_locations(power_name))
+            orders = [
+                rng.choice(sorted(possible_orders[loc])) for loc in locs if possible_orders[loc]
+            ]
+            game.set_orders(power_name, orders)
+        game.process()
+    return game
+
+
+def replay(game: Game) -> Tuple[Game, List[Tuple[str, Dict[str, List[str]]]]]:
+    """Get a new game on the map of a played game, and the orders of each of its phases."""
+    orders = [
+        (str(phase_name), phase_orders) for phase_name, phase_orders in game.order_history.items()
+    ]
+    return Game(map_name=game.map_name), orders
+
+
+def new_model(mode: Mode, game: Game) -> StanceExtraction:
+    """Create the model of a mode, for the first power of a game."""
+    identity = sorted(game.powers)[0]
+    if mode.model is ScoreBasedStance:
+        return mode.model(identity, game, **mode.options)
+    return mode.model(identity, game, random_seed=DEFAULT_SEED, **mode.options)
+
+
+def call(model: StanceExtraction, mode: Mode, game: Game) -> None:
+    """Call get_stance on a model as a mode does."""
+    if isinstance(model, ScoreBasedStance):
+        model.get_stance()
+    elif isinstance(model, ActionBasedStance) and mode.verbose:
+        _, log = model.get_stance(game, verbose=True)
+        log.render()
+    elif isinstance(model, ActionBasedStance):
+        model.get_stance(game)
+
+
+def clear_caches(map_descriptors: bool) -> None:
+    """
+    Empty the process-wide caches of the stance models, so that a mode does not reuse
+    the parsing done by the modes called before it on the same phase
+        map_descriptors: whether to also drop the compiled maps, compiled once per process
+    """
+    _build_order_table.cache_clear()
+    if map_descriptors:
+        with maps._DESCRIPTORS_LOCK:
+            maps._DESCRIPTORS.clear()
+
+
+def measure(
+    game: Game, modes: Sequence[Mode], repeat: int = DEFAULT_REPEAT
+) -> Dict[str, Dict[str, List[float]]]:
+    """
+    Replay a game, calling every mode after each phase
+        game: the played game
+        modes: the modes to measure
+        repeat: the number of timed replays, the fastest time of each call being kept
+    Returns mode name -> {"seconds": latency of each call, "peak_bytes": peak memory of each call}
+    Each call starts from empty caches, and the first call of each mode compiles the map,
+    as if every mode ran alone in its own process.
+    """
+    results: Dict[str, Dict[str, List[float]]] = {
+        mode.name: {"seconds": [], "peak_bytes": []} for mode in modes
+    }
+    # tracemalloc slows down every allocation, so the memory is measured in a last replay
+    for i in range(repeat + 1):
+        traced = i == repeat
+        replay_game, orders = replay(game)
+        models = [new_model(mode, replay_game) for mode in modes]
+        if traced:
+            tracemalloc.start()
+        try:
+            for p, (_, phase_orders) in enumerate(orders):
+                for power_name, power_orders in phase_orders.items():
+                    replay_game.set_orders(power_name, power_orders)
+                replay_game.process()
+                for mode, model in zip(modes, models):
+                    clear_caches(map_descriptors=p == 0)
+                    if not traced:
+                        start = time.perf_counter()
+                        call(model, mode, replay_game)
+                        seconds = time.perf_counter() - start
+                        times = results[mode.name]["seconds"]
+                        if i == 0:
+                            times.append(seconds)
+                        else:
+                            times[p] = min(times[p], seconds)
+                        continue
+                    if hasattr(tracemalloc, "reset_peak"):
+                        tracemalloc.reset_peak()
+                    else:
+                        # before Python 3.9, the peak is only reset along with the traces
+                        tracemalloc.clear_traces()
+                    current, _ = tracemalloc.get_traced_memory()
+                    call(model, mode, replay_game)
+                    _, peak = tracemalloc.get_traced_memory()
+                    results[mode.name]["peak_bytes"].append(peak - current)
+        finally:
+            if traced:
+                tracemalloc.stop()
+    return results
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Statistics of the measures of every call, the last one showing the cost late in the game."""
+    ordered = sorted(values)
+    return {
+        "mean": statistics.mean(ordered),
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max": ordered[-1],
+        "last": values[-1],
+    }
+
+
+def environment() -> Dict[str, Optional[str]]:
+    """Describe where the benchmarks ran, since timings are only comparable on the same machine."""
+    versions: Dict[str, Optional[str]] = {}
+    for package in ["diplomacy", "numpy"]:
+        try:
+            from importlib.metadata import version
+
+            versions[package] = version(package)
+        except Exception:
+            versions[package] = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        **versions,
+    }
+
+
+def run(
+    phases: Sequence[int] = DEFAULT_PHASES,
+    maps: Sequence[str] = DEFAULT_MAPS,
+    modes: Sequence[Mode] = DEFAULT_MODES,
+    seed: int = DEFAULT_SEED,
+    repeat: int = DEFAULT_REPEAT,
+) -> Dict[str, Any]:
+    """
+    Benchmark every mode on a synthetic game of each map and length
+        phases: the lengths of the games, in processed phases
+        maps: the names of the maps
+        modes: the modes to benchmark
+        seed: the seed of the games
+        repeat: the number of timed replays of each game
+    Returns the results in the format written by main
+    """
+    results = []
+    for map_name in maps:
+        for n_phases in phases:
+            game = make_game(n_phases, seed, map_name)
+            units = sum(len(units) for units in game.get_units().values())
+            for name, values in measure(game, modes, repeat).items():
+                seconds = summarize(values["seconds"])
+                peak_bytes = summarize(values["peak_bytes"])
+                results.append(
+                    {
+                        "map": map_name,
+                        "phases": len(game.state_history),
+                        "powers": len(game.powers),
+                        "units": units,
+                        "mode": name,
+                        "calls": len(values["seconds"]),
+                        "seconds": seconds,
+                        "peak_bytes": peak_bytes,
+                    }
+                )
+                print(
+                    f"{map_name:>10} {len(game.state_history):>4} phases {name:>20}: "
+                    f"median {seconds['median'] * 1e3:8.3f} ms, "
+                    f"peak {peak_bytes['max'] / 1024:9.1f} KiB",
+                    file=sys.stderr,
+                )
+    return {"seed": seed, "repeat": repeat, "environment": environment(), "results": results}
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """
+    Compare benchmark results against a baseline
+        results, baseline: results written by main
+        tolerance: the relative growth reported as a regression
+    Returns the regressions, as lines to report. The median latency and the maximal peak memory
+    are compared for every map, game length and mode found in both.
+    """
+
+    def key(result: Dict[str, Any]) -> Tuple[str, int, str]:
+        return result["map"], result["phases"], result["mode"]
+
+    previous = {key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        for metric, stat in [("seconds", "median"), ("peak_bytes", "max")]:
+            new_value, old_value = result[metric][stat], old[metric][stat]
+            ratio = new_value / old_value if old_value else float(new_value > 0) + 1.0
+            line = "{} {} phases {}: {} {} {:.4g} -> {:.4g} ({:+.1%})".format(
+                *key(result), stat, metric, old_value, new_value, ratio - 1
+            )
+            print(line, file=sys.stderr)
+            if ratio > 1 + tolerance:
+                regressions.append(line)
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--phases", type=int, nargs="+", default=list(DEFAULT_PHASES), help="game lengths"
+    )
+    parser.add_argument("--maps", nargs="+", default=list(DEFAULT_MAPS), help="map names")
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=[mode.name for mode in MODES],
+        default=[mode.name for mode in DEFAULT_MODES],
+        help="models and modes to benchmark",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="seed of the games")
+    parser.add_argument(
+        "--repeat", type=int, default=DEFAULT_REPEAT, help="timed replays of each game"
+    )
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="relative growth reported as a regression",
+    )
+    args = parser.parse_args(argv)
+
+    modes = [mode for mode in MODES if mode.name in args.modes]
+    if "action-numpy" in args.modes:
+        if importlib.util.find_spec("numpy") is None:
+            print("numpy is not installed, skipping action-numpy", file=sys.stderr)
+            modes = [mode for mode in modes if mode.name != "action-numpy"]
+
+    results = run(args.phases, args.maps, modes, args.seed, args.repeat)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        if regressions:
+            print("Regressions:\n" + "\n".join(regressions), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,37 @@
     Tested on the turn-level game logs in
     https://github.com/DenisPeskov/2020_acl_diplomacy/blob/master/utils/ExtraGameData.zip
 
+    The stance models are imported on first access, so importing the package
+    does not load the diplomacy engine until one of them is used.
+
 """
 
-from stance_vector.action_based_stance import ActionBasedStance as ActionBasedStance
-from stance_vector.score_based_stance import ScoreBasedStance as ScoreBasedStance
-from stance_vector.stance_extraction import StanceExtraction as StanceExtraction
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from stance_vector.action_based_stance import ActionBasedStance as ActionBasedStance
+    from stance_vector.score_based_stance import ScoreBasedStance as ScoreBasedStance
+    from stance_vector.stance_extraction import StanceExtraction as StanceExtraction
+
+# attribute -> module defining it
+_LAZY_ATTRIBUTES = {
+    "ActionBasedStance": "stance_vector.action_based_stance",
+    "ScoreBasedStance": "stance_vector.score_based_stance",
+    "StanceExtraction": "stance_vector.stance_extraction",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
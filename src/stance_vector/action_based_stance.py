@@ -1,14 +1,36 @@
 from copy import deepcopy
 from enum import Enum, auto
-from itertools import product
 import random
-from typing import Any, Dict, List, Optional, Set, Tuple, Union, overload
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+    overload,
+)
 
 from diplomacy import Game
 from diplomacy.utils import strings
 from typing_extensions import Literal
 
-from .stance_extraction import StanceExtraction
+from .maps import get_army_moves
+from .orders import OrderTable, get_order_table, parse_order
+from .stance_extraction import PhaseSnapshot, StanceExtraction
+from .state import StateReader, StateWriter
+
+if TYPE_CHECKING:
+    import numpy as np
+
+    from .game_log import GameLog
 
 
 class FlipReason(str, Enum):
@@ -18,6 +40,196 @@ class FlipReason(str, Enum):
     RANDOM = auto()
 
 
+class PhaseFeatures(NamedTuple):
+    """
+    Action features of a movement phase, indexed [n][k] from the standing point of nation n
+        hostility_to: hostile/conflict move scores of k's moves towards n
+        hostile_mov_to: hostile moves against n
+        conflict_mov_to: conflict moves against n
+        hostility_s_to: hostile/conflict support scores of k's supports against n
+        hostile_sup_to: hostile supports against n
+        conflict_sup_to: conflict supports against n
+        friendship_to: friendly support scores of k's supports to n
+        friendly_sup_to: friendly supports to n
+        friendship_ur_to: scores of k's unrealized hostile moves towards n
+        unrealized_move_to: potential hostile moves against n that were not made
+    """
+
+    hostility_to: Dict[str, Dict[str, float]]
+    hostile_mov_to: Dict[str, List[str]]
+    conflict_mov_to: Dict[str, List[str]]
+    hostility_s_to: Dict[str, Dict[str, float]]
+    hostile_sup_to: Dict[str, List[str]]
+    conflict_sup_to: Dict[str, List[str]]
+    friendship_to: Dict[str, Dict[str, float]]
+    friendly_sup_to: Dict[str, List[str]]
+    friendship_ur_to: Dict[str, Dict[str, float]]
+    unrealized_move_to: Dict[str, Set[str]]
+
+
+class NewPhases(NamedTuple):
+    """
+    Movement phases of a game read by ActionBasedStance.read_new_m_phases
+        key: the game and the length of its history, recorded once the phases are folded in
+        snapshots: the movement phases processed since the last one consumed
+    """
+
+    key: Tuple[Optional[str], int]
+    snapshots: List[PhaseSnapshot]
+
+
+class PhaseUpdate(NamedTuple):
+    """
+    A movement phase folded into the stances by ActionBasedStance.apply_new_m_phases
+        name: the name of the movement phase
+        features: the action features of the phase
+        stance: the stances after the phase
+    """
+
+    name: str
+    features: PhaseFeatures
+    stance: Dict[str, Dict[str, float]]
+
+
+class FeatureCounts(NamedTuple):
+    """
+    Action counts of a movement phase, indexed [n][k] from the standing point of nation n
+        hostile_moves: k's hostile moves against n
+        conflict_moves: k's conflict moves against n
+        hostile_supports: k's hostile supports/convoys against n
+        conflict_supports: k's conflict supports/convoys against n
+        friendly_supports: k's supports/convoys to n
+        unrealized_moves: 1 if k could attack n and didn't, else 0
+    """
+
+    hostile_moves: Dict[str, Dict[str, float]]
+    conflict_moves: Dict[str, Dict[str, float]]
+    hostile_supports: Dict[str, Dict[str, float]]
+    conflict_supports: Dict[str, Dict[str, float]]
+    friendly_supports: Dict[str, Dict[str, float]]
+    unrealized_moves: Dict[str, Dict[str, float]]
+
+
+class Explanation(NamedTuple):
+    """
+    Contributions to the stance of nation n on nation k in a stance update
+        nation: n, the standing point
+        opponent: k
+        stance_prev: the stance before the update, decayed by the discount factor
+        discount: the discount factor
+        hostility: hostile/conflict move score, subtracted
+        hostility_s: hostile/conflict support score, subtracted
+        friendship: friendly support score, added
+        friendship_ur: unrealized hostile move score, added
+        flip: the reason the stance was flipped afterwards, if it was
+        stance: the stance after the update
+    """
+
+    nation: str
+    opponent: str
+    stance_prev: float
+    discount: float
+    hostility: float
+    hostility_s: float
+    friendship: float
+    friendship_ur: float
+    flip: Optional[FlipReason]
+    stance: float
+
+    def render(self, year_threshold: int) -> str:
+        """
+        Render the explanation as the verbose log text
+            year_threshold: the year after which everyone is betrayed
+        """
+        k = self.opponent
+        lines = [
+            f"My stance to {k} decays from {float(self.stance_prev):0.2} to {float(self.discount * self.stance_prev):0.2} by a factor {float(self.discount):0.2}."
+        ]
+        if self.hostility != 0:
+            lines.append(
+                f"My stance to {k} decreases by {float(self.hostility):0.2} because of their hostile/conflict moves towards me."
+            )
+        if self.hostility_s != 0:
+            lines.append(
+                f"My stance to {k} decreases by {float(self.hostility_s):0.2} because of their hostile/conflict support."
+            )
+        if self.friendship != 0:
+            lines.append(
+                f"My stance to {k} increases by {float(self.friendship):0.2} because of receiving their support."
+            )
+        if self.friendship_ur > 0:
+            lines.append(
+                f"My stance to {k} increases by {float(self.friendship_ur):0.2} because they could attack but didn't."
+            )
+        elif self.friendship_ur < 0:
+            lines.append(
+                f"My stance to {k} decreases by {float(self.friendship_ur):0.2} because of they could be a threat."
+            )
+        if self.flip == FlipReason.RANDOM:
+            lines.append(
+                f"My stance to {k} becomes {float(self.stance):0.2} because I plan to betray {k} to break the peace."
+            )
+        elif self.flip == FlipReason.END_GAME:
+            lines.append(
+                f"My stance to {k} becomes {float(self.stance):0.2}, because I plan to betray everyone after year {year_threshold}."
+            )
+        lines.append(f"My final stance score to {k} is {float(self.stance):0.2}.")
+        return "\n".join(lines)
+
+
+class ExplanationRow(Mapping[str, str]):
+    """Explanations of the stances of one nation, rendered as text when accessed."""
+
+    def __init__(self, records: Dict[str, Optional[Explanation]], year_threshold: int) -> None:
+        self.records = records
+        self.year_threshold = year_threshold
+
+    def __getitem__(self, opponent: str) -> str:
+        record = self.records[opponent]
+        return "" if record is None else record.render(self.year_threshold)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class StanceLog(Mapping[str, ExplanationRow]):
+    """
+    Verbose log of a stance update, such that log[n][k] is the text explaining
+    the stance of n on k, rendered only when it is accessed.
+        records: n -> k -> the numbers behind the text, None for n == k
+        year_threshold: the year after which everyone is betrayed
+    The records are plain tuples, cheap to keep and serialize, e.g. with Explanation._asdict.
+    """
+
+    def __init__(
+        self, records: Dict[str, Dict[str, Optional[Explanation]]], year_threshold: int
+    ) -> None:
+        self.records = records
+        self.year_threshold = year_threshold
+
+    def __getitem__(self, nation: str) -> ExplanationRow:
+        return ExplanationRow(self.records[nation], self.year_threshold)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __repr__(self) -> str:
+        return repr({n: dict(self[n]) for n in self})
+
+    def render(self) -> Dict[str, Dict[str, str]]:
+        """Render every explanation, as the bi-level dictionary of texts log[n][k]."""
+        return {n: dict(self[n]) for n in self}
+
+
 class ActionBasedStance(StanceExtraction):
     """
     A turn-level action-based objective stance vector baseline
@@ -29,6 +241,9 @@ class ActionBasedStance(StanceExtraction):
         - beta2 * count(k's conflict supports/convoys)
         + gamma1 * count(k's friendly supports/convoys)
         + gamma2 * count(k's unrealized hostile moves)
+    With ego_only, only the stances of my identity, and to it with ego_column, are computed.
+    With the default random_betrayal=True, any nation may draw a betrayal, so every row
+    is still extracted and updated, and the mode saves nothing but building the log.
     """
 
     alpha1: float
@@ -42,11 +257,26 @@ class ActionBasedStance(StanceExtraction):
     year_threshold: int
     random_betrayal: bool
     random: random.Random
+    deepcopy_game: bool
+    numpy_engine: bool
+    stance_matrix: Optional["np.ndarray"]
+    feature_matrices: Dict[str, "np.ndarray"]
+    incremental: bool
+    last_m_phase: Optional[str]
+    _consumed_key: Optional[Tuple[Optional[str], int]]
+    _last_features: Optional[PhaseFeatures]
+    _last_flipped: Dict[Tuple[str, str], FlipReason]
+    _last_log: Optional[StanceLog]
+    ego_only: bool
+    ego_column: bool
+    _stance_layout: Dict[str, List[str]]
+    _log_layout: Dict[str, List[str]]
+    _feature_pairs: Optional[Set[Tuple[str, str]]]
 
     def __init__(
         self,
         my_identity: str,
-        game: Game,
+        game: Union[Game, "GameLog"],
         invasion_coef: float = 1.0,
         conflict_coef: float = 0.5,
         invasive_support_coef: float = 1.0,
@@ -58,7 +288,14 @@ class ActionBasedStance(StanceExtraction):
         year_threshold: int = 1918,
         random_betrayal: bool = True,
         random_seed: Optional[int] = None,
+        deepcopy_game: bool = False,
+        numpy_engine: bool = False,
+        incremental: bool = False,
+        ego_only: bool = False,
+        ego_column: bool = False,
     ) -> None:
+        if ego_only and numpy_engine:
+            raise ValueError("The ego-only mode is not supported by the numpy engine")
         super().__init__(my_identity, game)
         # hyperparameters weighting different actions
         self.alpha1 = invasion_coef
@@ -72,6 +309,52 @@ class ActionBasedStance(StanceExtraction):
         self.year_threshold = year_threshold
         self.random_betrayal = random_betrayal
         self.random = random.Random(random_seed)
+        # deep copy the whole game on each call instead of reading a phase snapshot
+        self.deepcopy_game = deepcopy_game
+        # hold stances and features as N x N arrays, see stance_vector.matrix, the kernel writing
+        # the features into them; on seven powers, this is no faster than the dicts
+        self.numpy_engine = numpy_engine
+        self.stance_matrix = None
+        self.feature_matrices = {}
+        if numpy_engine:
+            from .matrix import MatrixView, to_matrix
+
+            self.stance_matrix = to_matrix(self.stance, self.nations)
+            self.stance = cast(
+                Dict[str, Dict[str, float]], MatrixView(self.stance_matrix, self.nations)
+            )
+        # fold in each processed movement phase once, instead of the latest one on every call
+        self.incremental = incremental
+        self.last_m_phase = None
+        self._consumed_key = None
+        self._last_features = None
+        self._last_flipped = {}
+        self._last_log = None
+        # only compute the stances of my_identity (ego_only), and to it (ego_column)
+        self.ego_only = ego_only
+        self.ego_column = ego_column
+        # every nation may draw a random betrayal, so all rows are kept to replay the draws
+        self._stance_layout = self._ego_layout(all_rows=random_betrayal)
+        self._log_layout = self._ego_layout()
+        self._feature_pairs = None
+        if ego_only and not random_betrayal:
+            self._feature_pairs = {(n, k) for n, row in self._stance_layout.items() for k in row}
+            self.stance = {
+                n: {k: self.stance[n][k] for k in row} for n, row in self._stance_layout.items()
+            }
+
+    def _ego_layout(self, all_rows: bool = False) -> Dict[str, List[str]]:
+        """
+        Get the stances computed in the ego-only mode
+            all_rows: whether every row is needed
+        Returns a dict from each computed row n to its columns k
+        """
+        nations = self.nations
+        if not self.ego_only or all_rows:
+            return {n: nations for n in nations}
+        if self.ego_column:
+            return {n: nations if n == self.identity else [self.identity] for n in nations}
+        return {self.identity: nations}
 
     def __game_deepcopy__(self, game: Game) -> None:
         """Fast deep copy implementation, from Paquette's game engine https://github.com/diplomacy/diplomacy"""
@@ -110,86 +393,222 @@ class ActionBasedStance(StanceExtraction):
         The parser will return a tuple:
         (order_type, unit_location, source_location, *target_location)
         """
-        order_comp = order.split()
-        if len(order_comp) == 3:
-            if order_comp[2] == "H":
-                return "HOLD", order_comp[1], order_comp[1]
-        elif len(order_comp) == 4:
-            if order_comp[2] in {"-", "R"}:
-                return "MOVE", order_comp[1], order_comp[1], order_comp[3]
-        elif len(order_comp) == 5:
-            if order_comp[2] == "-":
-                return "MOVE", order_comp[1], order_comp[1], order_comp[3]
-            elif order_comp[2] == "S":
-                return "SUPPORT", order_comp[1], order_comp[4]
-        elif len(order_comp) == 7:
-            if order_comp[2] == "S":
-                return "SUPPORT", order_comp[1], order_comp[4], order_comp[6]
-            elif order_comp[2] == "C":
-                return "CONVOY", order_comp[1], order_comp[4], order_comp[6]
-        return "UNKNOWN", "UNKNOWN", "UNKNOWN"
+        return parse_order(order)
+
+    def get_order_table(self) -> OrderTable:
+        """
+        Get the parsed orders of the previous movement phase grouped by power.
+        The table is parsed once per phase and shared with other instances.
+        """
+        cache = self._phase_cache()
+        if "order_table" not in cache:
+            cache["order_table"] = get_order_table(self.get_prev_m_snapshot().orders)
+        order_table: OrderTable = cache["order_table"]
+        return order_table
+
+    def extract_features(self, m_phase_data: Optional[PhaseSnapshot] = None) -> PhaseFeatures:
+        """
+        Fused feature kernel of a movement phase, the previous one by default.
+        Every order is walked once and attributed to the nations it affects
+        through a location-to-owner index, which produces the hostile move,
+        hostile support, friendly support and unrealized move tables together.
+        Requires self.territories to hold the territories of the phase, see extract_terr.
+        In the ego-only mode, only the features of the computed stances are extracted.
+        """
+        if m_phase_data is None:
+            cache = self._phase_cache()
+            cached = cache.get("features")
+            if cached is not None and cached[0] is self.territories:
+                cached_features: PhaseFeatures = cached[1]
+                return cached_features
+            features = self.extract_features(self.get_prev_m_snapshot())
+            cache["features"] = (self.territories, features)
+            return features
+        return self._feature_kernel(
+            m_phase_data,
+            (self.alpha1, self.alpha2, self.beta1, self.beta2, self.gamma1, self.gamma2),
+        )
+
+    def extract_feature_counts(self, m_phase_data: Optional[PhaseSnapshot] = None) -> FeatureCounts:
+        """
+        Count the actions behind the features of a movement phase, the previous one by default,
+        such that the features are linear in the coefficients of this model.
+        Requires self.territories to hold the territories of the phase, see extract_terr.
+        """
+        if m_phase_data is None:
+            m_phase_data = self.get_prev_m_snapshot()
+        # every count is a sum of ones, so it is exact whatever the order of the additions
+        direct = self._feature_kernel(m_phase_data, (1.0, 0.0, 1.0, 0.0, 1.0, 1.0))
+        conflict = self._feature_kernel(m_phase_data, (0.0, 1.0, 0.0, 1.0, 0.0, 0.0))
+        return FeatureCounts(
+            direct.hostility_to,
+            conflict.hostility_to,
+            direct.hostility_s_to,
+            conflict.hostility_s_to,
+            direct.friendship_to,
+            direct.friendship_ur_to,
+        )
+
+    def _new_feature_table(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get a zeroed feature table[n][k] for the kernel to write into,
+        a view of an N x N array with the numpy engine, see stance_vector.matrix
+        """
+        if self.numpy_engine:
+            from .matrix import MatrixView
+
+            return cast(Dict[str, Dict[str, float]], MatrixView.zeros(self.nations))
+        return {n: {k: 0 for k in self.nations} for n in self.nations}
+
+    def _feature_kernel(
+        self, m_phase_data: PhaseSnapshot, weights: Tuple[float, float, float, float, float, float]
+    ) -> PhaseFeatures:
+        """
+        Body of extract_features
+            m_phase_data: the movement phase
+            weights: the coefficients alpha1, alpha2, beta1, beta2, gamma1 and gamma2
+        """
+        alpha1, alpha2, beta1, beta2, gamma1, gamma2 = weights
+        nations = self.nations
+        order_table = get_order_table(m_phase_data.orders)
+
+        hostility_to = self._new_feature_table()
+        hostility_s_to = self._new_feature_table()
+        friendship_to = self._new_feature_table()
+        friendship_ur_to = self._new_feature_table()
+        hostile_mov_to: Dict[str, List[str]] = {n: [] for n in nations}
+        conflict_mov_to: Dict[str, List[str]] = {n: [] for n in nations}
+        hostile_sup_to: Dict[str, List[str]] = {n: [] for n in nations}
+        conflict_sup_to: Dict[str, List[str]] = {n: [] for n in nations}
+        friendly_sup_to: Dict[str, List[str]] = {n: [] for n in nations}
+
+        territories = self.territories
+        owners = territories.owners
+        # the pairs (n, k) to compute in the ego-only mode, all of them otherwise
+        ego_pairs = self._feature_pairs
+
+        # move -> nations it is hostile to / conflicts with, whoever supports it
+        hostile_to_move: Dict[str, Set[str]] = {}
+        conflict_to_move: Dict[str, Set[str]] = {}
+        for move, (target, movers) in order_table.moves.items():
+            target_owners = owners.get(target, ())
+            hostile_to_move[move] = {n for n in target_owners if any(m != n for m in movers)}
+            conflict_to_move[move] = {
+                n
+                for n in order_table.moves_to.get(target, ())
+                if n not in target_owners and any(m != n for m in movers)
+            }
+
+        # armies adjacent to a territory could attack it
+        army_moves = get_army_moves(m_phase_data.map)
+        adj_pairs: Dict[Tuple[str, str], Set[str]] = {}
+        for opp in nations:
+            for opp_unit in m_phase_data.state["units"][opp]:
+                if opp_unit[0] != "A":
+                    continue
+                army = opp_unit[2:5]
+                for loc in army_moves.get(army, ()):
+                    for n in owners.get(loc, ()):
+                        if n != opp and (ego_pairs is None or (n, opp) in ego_pairs):
+                            adj_pairs.setdefault((n, opp), set()).add(f"{army}-{loc}")
+        for n, opp in adj_pairs:
+            friendship_ur_to[n][opp] = gamma2
+
+        for opp in nations:
+            for order in order_table.get(opp, ()):
+                if order.kind == "MOVE" and order.target is not None:
+                    target = order.target
+                    move = f"{order.unit}-{target}"
+                    target_owners = owners.get(target, ())
+                    # invasion or cut support/convoy
+                    for n in target_owners:
+                        if n == opp or (ego_pairs is not None and (n, opp) not in ego_pairs):
+                            continue
+                        hostility_to[n][opp] += alpha1
+                        hostile_mov_to[n].append(move)
+                        # the attack was realized
+                        realizable = adj_pairs.get((n, opp))
+                        if realizable is not None and move in realizable:
+                            realizable.remove(move)
+                            friendship_ur_to[n][opp] = 0
+                    # seize the same city
+                    for n in order_table.moves_to.get(target, ()):
+                        if n == opp or (ego_pairs is not None and (n, opp) not in ego_pairs):
+                            continue
+                        if n not in target_owners:
+                            hostility_to[n][opp] += alpha2
+                            conflict_mov_to[n].append(move)
+                elif order.kind in {"SUPPORT", "CONVOY"}:
+                    unit = order.unit
+                    source = order.source
+                    supported = order.target
+                    # if not supporting a HOLD
+                    if supported is not None:
+                        support = f"{unit}:{source}-{supported}"
+                        # support invasion or support a cut support/convoy
+                        hostile = hostile_to_move.get(f"{source}-{supported}", set())
+                        for n in hostile:
+                            if n != opp and (ego_pairs is None or (n, opp) in ego_pairs):
+                                hostility_s_to[n][opp] += beta1
+                                hostile_sup_to[n].append(support)
+                        # as in extract_hostile_supports, the target is matched against the conflict moves
+                        for n in conflict_to_move.get(supported, ()):
+                            if n == opp or (ego_pairs is not None and (n, opp) not in ego_pairs):
+                                continue
+                            if n not in hostile:
+                                hostility_s_to[n][opp] += beta2
+                                conflict_sup_to[n].append(support)
+                    else:
+                        support = f"{unit}:{source}"
+                    # any kind of support to n
+                    for n in owners.get(source, ()):
+                        if n != opp and (ego_pairs is None or (n, opp) in ego_pairs):
+                            friendship_to[n][opp] += gamma1
+                            friendly_sup_to[n].append(support)
+
+        unrealized_move_to: Dict[str, Set[str]] = {n: set() for n in nations}
+        for (n, _), pairs in adj_pairs.items():
+            unrealized_move_to[n] |= pairs
+
+        return PhaseFeatures(
+            hostility_to,
+            hostile_mov_to,
+            conflict_mov_to,
+            hostility_s_to,
+            hostile_sup_to,
+            conflict_sup_to,
+            friendship_to,
+            friendly_sup_to,
+            friendship_ur_to,
+            unrealized_move_to,
+        )
 
     def extract_hostile_moves(self, nation: str) -> Tuple[Dict[str, float], List[str], List[str]]:
         """
         Extract hostile moves toward a nation and evaluate
         the hostility scores it holds to other nations
             nation: standing point
-            game_rec: the turn-level JSON log of a game
         Returns
             hostility: a dict of hostility move scores of the given nation
             hostile_moves: a list of hostile moves against the given nation
             conflict_moves: a list of conflict moves against the given nation
         """
-        hostility: Dict[str, float] = {n: 0 for n in self.nations}
-        hostile_moves = []
-        conflict_moves = []
-
-        # extract my target cities
-
-        m_phase_data = self.get_prev_m_phase()
-
-        my_targets = []
-        my_orders = m_phase_data.orders[nation]
-        for order in my_orders:
-            order = self.order_parser(order)
-            if order[0] == "MOVE":
-                target = order[-1]
-                if target not in self.territories[nation]:
-                    my_targets.append(target)
-
-        # extract other's hostile MOVEs
-
-        for opp in self.nations:
-            if opp == nation:
-                continue
-            opp_orders = m_phase_data.orders[opp]
-            if len(opp_orders) == 0:
-                continue
-            for order in opp_orders:
-                order = self.order_parser(order)
-                if order[0] == "MOVE":
-                    target = order[-1]
-                    unit = order[1]
-                    # invasion or cut support/convoy
-                    if target in self.territories[nation]:
-                        hostility[opp] += self.alpha1
-                        hostile_moves.append(f"{unit}-{target}")
-                    # seize the same city
-                    elif target in my_targets:
-                        hostility[opp] += self.alpha2
-                        conflict_moves.append(f"{unit}-{target}")
-
-        return hostility, hostile_moves, conflict_moves
+        features = self.extract_features()
+        return (
+            dict(features.hostility_to[nation]),
+            list(features.hostile_mov_to[nation]),
+            list(features.conflict_mov_to[nation]),
+        )
 
     def extract_hostile_supports(
-        self, nation: str, hostile_mov: List[str], conflict_mov: List[str]
+        self, nation: str, hostile_mov: Iterable[str], conflict_mov: Iterable[str]
     ) -> Tuple[Dict[str, float], List[str], List[str]]:
         """
         Extract hostile support toward a nation and evaluate
         the hostility scores it holds to other nations
             nation: standing point
-            hostile_mov: a list of hostile moves against the given nation
-            conflict_mov: a list of conflict moves against the given nation
+            hostile_mov: hostile moves against the given nation
+            conflict_mov: conflict moves against the given nation
             game_rec: the turn-level JSON log of a game
         Returns
             hostility: dict of hostility support scores of the given nation
@@ -199,31 +618,29 @@ class ActionBasedStance(StanceExtraction):
         hostility: Dict[str, float] = {n: 0 for n in self.nations}
         hostile_supports = []
         conflict_supports = []
-        m_phase_data = self.get_prev_m_phase()
+        order_table = self.get_order_table()
+        hostile_moves = set(hostile_mov)
+        conflict_moves = set(conflict_mov)
 
         # extract other's hostile MOVEs
 
         for opp in self.nations:
             if opp == nation:
                 continue
-            opp_orders = m_phase_data.orders[opp]
-            if len(opp_orders) == 0:
-                continue
-            for order in opp_orders:
-                order = self.order_parser(order)
-                if order[0] in {"SUPPORT", "CONVOY"}:
-                    unit = order[1]
-                    source = order[2]
+            for order in order_table.get(opp, ()):
+                if order.kind in {"SUPPORT", "CONVOY"}:
+                    unit = order.unit
+                    source = order.source
                     # if not supporting a HOLD
-                    if len(order) > 3:
-                        target = order[3]
+                    if order.target is not None:
+                        target = order.target
                         support = f"{source}-{target}"
                         # support invasion or support a cut support/convoy
-                        if support in hostile_mov:
+                        if support in hostile_moves:
                             hostility[opp] += self.beta1
                             hostile_supports.append(f"{unit}:{source}-{target}")
                         # support an attack to seize the same city
-                        elif target in conflict_mov:
+                        elif target in conflict_moves:
                             hostility[opp] += self.beta2
                             conflict_supports.append(f"{unit}:{source}-{target}")
 
@@ -234,38 +651,12 @@ class ActionBasedStance(StanceExtraction):
         Extract friendly support toward a nation and evaluate
         the friend scores it holds to other nations
             nation: standing point
-            game_rec: the turn-level JSON log of a game
         Returns
             friendship: dict of friend scores of the given nation
             friendly_supports: list of friendly supports for the given nation
         """
-        friendship: Dict[str, float] = {n: 0 for n in self.nations}
-        friendly_supports = []
-        m_phase_data = self.get_prev_m_phase()
-        # extract others' friendly SUPPORT
-
-        for opp in self.nations:
-            if opp == nation:
-                continue
-            opp_orders = m_phase_data.orders[opp]
-
-            if not opp_orders:
-                continue
-            for order in opp_orders:
-                order = self.order_parser(order)
-                unit = order[1]
-                if order[0] in {"SUPPORT", "CONVOY"}:
-                    source = order[2]
-                    # any kind of support to me
-                    if source in self.territories[nation]:
-                        friendship[opp] += self.gamma1
-                        if len(order) > 3:
-                            target = order[3]
-                            friendly_supports.append(f"{unit}:{source}-{target}")
-                        else:
-                            friendly_supports.append(f"{unit}:{source}")
-
-        return friendship, friendly_supports
+        features = self.extract_features()
+        return dict(features.friendship_to[nation]), list(features.friendly_sup_to[nation])
 
     def extract_unrealized_hostile_moves(self, nation: str) -> Tuple[Dict[str, float], Set[str]]:
         """
@@ -273,46 +664,11 @@ class ActionBasedStance(StanceExtraction):
         the friendship scores it holds to other nations
             nation: standing point
         Returns
-            friendship:
-            unrealized_hostile_moves: a list of potential hostile moves against the given nation
+            friendship: dict of scores of nations that could attack but didn't
+            unrealized_hostile_moves: a set of potential hostile moves against the given nation
         """
-        friendship: Dict[str, float] = {n: 0 for n in self.nations}
-        unrealized_hostile_moves: List[Any] = []
-
-        m_phase_data = self.get_prev_m_phase()
-
-        # extract other's unrealized hostile MOVEs
-
-        for opp in self.nations:
-            if opp == nation:
-                continue
-            opp_orders = m_phase_data.orders[opp]
-            opp_units = m_phase_data.state["units"][opp]
-            adj_pairs = set()
-            for opp_unit in opp_units:
-                for loc in self.territories[nation]:
-                    if opp_unit[0] == "A":
-                        if self.game.map.abuts("A", opp_unit[2:5], "-", loc):
-                            adj_pairs.add(f"{opp_unit[2:5]}-{loc}")
-
-            if len(adj_pairs) > 0:
-                friendship[opp] = self.gamma2
-
-            if len(opp_orders) == 0:
-                continue
-            for order in opp_orders:
-                order = self.order_parser(order)
-                if order[0] == "MOVE":
-                    target = order[-1]
-                    unit = order[1]
-                    # invasion or cut support/convoy
-                    if target in self.territories[nation]:
-                        hostile_order = f"{unit}-{target}"
-                        if hostile_order in adj_pairs:
-                            adj_pairs.remove(hostile_order)
-                            friendship[opp] = 0
-
-        return friendship, adj_pairs
+        features = self.extract_features()
+        return dict(features.friendship_ur_to[nation]), set(features.unrealized_move_to[nation])
 
     @overload
     def get_stance(  # type: ignore[misc]
@@ -323,46 +679,210 @@ class ActionBasedStance(StanceExtraction):
     @overload
     def get_stance(
         self, game: Game, message: Any = ..., verbose: Literal[True] = ...
-    ) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Dict[str, str]]]:
+    ) -> Tuple[Dict[str, Dict[str, float]], StanceLog]:
         ...
 
-    def get_stance(  # type: ignore[misc]
+    def get_stance(
         self, game: Game, message: Any = None, verbose: bool = False
-    ) -> Union[Dict[str, Dict[str, float]], Tuple[Dict[str, Dict[str, float]], Dict[str, str]]]:
+    ) -> Union[Dict[str, Dict[str, float]], Tuple[Dict[str, Dict[str, float]], StanceLog]]:
         """
         Extract turn-level objective stance of nation n on nation k.
             game_rec: the turn-level JSON log of a game,
             messages is not used
         Returns a bi-level dictionary of stance score stance[n][k]
+        In incremental mode, the movement phases processed since the last call are folded in
+        and a repeated call within the same phase returns the same result.
+        """
+        with self._instrumented_call("get_stance", game.current_short_phase):
+            if self.incremental:
+                self._catch_up(game)
+            else:
+                if self.deepcopy_game:
+                    # deepcopy NetworkGame to Game
+                    with self._stage("deepcopy"):
+                        self.__game_deepcopy__(game)
+                else:
+                    # only the previous movement phase is read, through a snapshot of the history
+                    self.game = game
+                with self._stage("get_prev_m_phase"):
+                    m_phase_data = self.get_prev_m_snapshot()
+                self._consume_m_phase(m_phase_data, cached=True)
+
+            if not verbose:
+                return self.stance
+            with self._stage("log"):
+                log = self.get_log()
+            return self.stance, log
+
+    def get_log(self) -> StanceLog:
+        """
+        Explain the last stance update, recorded once per update and rendered on access.
+        In the ego-only mode, only the stances of (and to) my identity are explained.
+        Returns a bi-level mapping of explanations log[n][k], empty before any update
+        """
+        if self._last_log is not None:
+            return self._last_log
+        layout = self._log_layout
+        if self._last_features is None:
+            return StanceLog({n: {k: None for k in row} for n, row in layout.items()}, 0)
+
+        features = self._last_features
+        flipped = self._last_flipped
+        hostility_to = features.hostility_to
+        hostility_s_to = features.hostility_s_to
+        friendship_to = features.friendship_to
+        friendship_ur_to = features.friendship_ur_to
+        stance_prev = self.stance_prev
+        stance = self.stance
+        records: Dict[str, Dict[str, Optional[Explanation]]] = {}
+        for n, row in layout.items():
+            prev_row = stance_prev[n]
+            stance_row = stance[n]
+            records[n] = {
+                k: None
+                if k == n
+                else Explanation(
+                    n,
+                    k,
+                    prev_row[k],
+                    self.discount,
+                    hostility_to[n][k],
+                    hostility_s_to[n][k],
+                    friendship_to[n][k],
+                    friendship_ur_to[n][k],
+                    flipped.get((n, k)),
+                    stance_row[k],
+                )
+                for k in row
+            }
+
+        self._last_log = StanceLog(records, self.year_threshold)
+        return self._last_log
+
+    def stance_trajectory(
+        self, game: Union[Game, "GameLog"], workers: Optional[int] = None
+    ) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Extract the stances after every movement phase of a game in one pass over its history,
+        as calling get_stance once after each movement phase would.
+        The stances continue from, and are left in, the current state of this instance.
+            game: the game, or a saved game log read with stance_vector.game_log.GameLog
+            workers: number of worker processes extracting the features of the phases
+                     in parallel, see stance_vector.parallel, None to extract them here
+        Returns a dictionary from movement phase names to copies of stance[n][k]
+        """
+        if isinstance(game, Game):
+            self.game = game
+        snapshots = self.iter_m_snapshots(game)
+        if workers is None:
+            phases: Iterable[Tuple[PhaseSnapshot, Optional[PhaseFeatures]]] = (
+                (m_phase_data, None) for m_phase_data in snapshots
+            )
+        else:
+            from .parallel import iter_phase_features
+
+            phases = iter_phase_features(self, snapshots, workers)
+        trajectory = {}
+        for m_phase_data, features in phases:
+            self._consume_m_phase(m_phase_data, features=features)
+            trajectory[m_phase_data.name] = {n: dict(row) for n, row in self.stance.items()}
+        return trajectory
+
+    def _catch_up(self, game: Game) -> None:
+        """
+        Fold in the movement phases of a game processed since the last one consumed,
+        all of them if that phase is not in the history of the game.
+        Nothing is read if the game did not advance since the last call.
+        """
+        self.apply_new_m_phases(self.read_new_m_phases(game))
+
+    def read_new_m_phases(self, game: Game) -> NewPhases:
+        """
+        Read the movement phases of a game processed since the last one consumed,
+        the only part of the incremental catch-up reading the game,
+        such that apply_new_m_phases can run where the game is not accessed, e.g. another thread.
+        """
+        key = (game.game_id, len(game.state_history))
+        if key == self._consumed_key:
+            return NewPhases(key, [])
+        if self.deepcopy_game:
+            with self._stage("deepcopy"):
+                self.__game_deepcopy__(game)
+        else:
+            self.game = game
+        with self._stage("get_prev_m_phase"):
+            snapshots = self._m_snapshots_after(self.game, self.last_m_phase)
+        return NewPhases(key, snapshots)
+
+    def apply_new_m_phases(self, new_phases: NewPhases) -> List[PhaseUpdate]:
+        """
+        Fold in the movement phases read by read_new_m_phases, as get_stance does in incremental mode
+        Returns the update of each phase, in order
+        """
+        updates = []
+        for m_phase_data in new_phases.snapshots:
+            features = self._consume_m_phase(m_phase_data)
+            updates.append(PhaseUpdate(m_phase_data.name, features, self.stance))
+        self._consumed_key = new_phases.key
+        return updates
+
+    def consume_m_phase(
+        self, m_phase_data: PhaseSnapshot, features: Optional[PhaseFeatures] = None
+    ) -> PhaseFeatures:
+        """
+        Update the stances with the actions of a movement phase, to drive this model
+        one phase at a time over snapshots read elsewhere, see iter_m_snapshots
+            m_phase_data: the movement phase
+            features: the features of the phase if they were already extracted
+        Returns the features of the phase
+        """
+        return self._consume_m_phase(m_phase_data, features=features)
+
+    def _consume_m_phase(
+        self,
+        m_phase_data: PhaseSnapshot,
+        cached: bool = False,
+        features: Optional[PhaseFeatures] = None,
+    ) -> PhaseFeatures:
+        """
+        Update the stances with the actions of a movement phase, returning its features
+            m_phase_data: the movement phase
+            cached: whether m_phase_data is the previous movement phase of self.game,
+                    whose features are memoized until the game advances
+            features: the features of the phase if they were already extracted
         """
-        # deepcopy NetworkGame to Game
-        self.__game_deepcopy__(game)
         # extract territory info
-        self.territories = self.extract_terr()
-
-        # extract hostile moves
-        hostility_to, hostile_mov_to, conflict_mov_to = {}, {}, {}
-        for n in self.nations:
-            hostility_to[n], hostile_mov_to[n], conflict_mov_to[n] = self.extract_hostile_moves(n)
-
-        # extract hostile supports
-        hostility_s_to, hostile_sup_to, conflict_sup_to = {}, {}, {}
-        for n in self.nations:
-            (
-                hostility_s_to[n],
-                hostile_sup_to[n],
-                conflict_sup_to[n],
-            ) = self.extract_hostile_supports(n, hostile_mov_to[n], conflict_mov_to[n])
-
-        # extract friendly supports
-        friendship_to, friendly_sup_to = {}, {}
-        for n in self.nations:
-            friendship_to[n], friendly_sup_to[n] = self.extract_friendly_supports(n)
-
-        # extract unrealized hostile moves
-        friendship_ur_to, unrealized_move_to = {}, {}
-        for n in self.nations:
-            friendship_ur_to[n], unrealized_move_to[n] = self.extract_unrealized_hostile_moves(n)
+        with self._stage("extract_terr"):
+            self.territories = self.extract_terr(m_phase_data)
+
+        # extract hostile moves, hostile supports, friendly supports and unrealized hostile moves
+        if features is None:
+            with self._stage("extract_features"):
+                features = self.extract_features(None if cached else m_phase_data)
+
+        with self._stage("update"):
+            if self.numpy_engine:
+                flipped = self._update_stance_matrix(features, m_phase_data.name)
+            else:
+                flipped = self._update_stance_dict(features, m_phase_data.name)
+        self.last_m_phase = m_phase_data.name
+        self._last_features = features
+        self._last_flipped = flipped
+        self._last_log = None
+        return features
+
+    def _update_stance_dict(
+        self, features: PhaseFeatures, m_phase_name: str
+    ) -> Dict[Tuple[str, str], FlipReason]:
+        """
+        Decay the stances and accumulate the features of a movement phase,
+        then apply the betrayal heuristics.
+        Returns the pairs whose stance was flipped, with the reason.
+        """
+        hostility_to = features.hostility_to
+        hostility_s_to = features.hostility_s_to
+        friendship_to = features.friendship_to
+        friendship_ur_to = features.friendship_ur_to
 
         self.stance_prev = self.stance
 
@@ -373,23 +893,22 @@ class ActionBasedStance(StanceExtraction):
                 - hostility_s_to[n][k]
                 + friendship_to[n][k]
                 + friendship_ur_to[n][k]
-                for k in self.nations
+                for k in row
             }
-            for n in self.nations
+            for n, row in self._stance_layout.items()
         }
 
-        flipped = {n: {k: "" for k in self.nations} for n in self.nations}
+        flipped = {}
 
         # simple heuristic to make all other countries enemies
-        m_phase_data = self.get_prev_m_phase()
-        m_phase_year = int(m_phase_data.name[1:5])
+        m_phase_year = int(m_phase_name[1:5])
         if self.end_game_flip:
             if m_phase_year > self.year_threshold:
-                for n in self.nations:
-                    for k in self.nations:
+                for n, row in self._stance_layout.items():
+                    for k in row:
                         if self.stance[n][k] > 0:
                             self.stance[n][k] = -1
-                            flipped[n][k] = FlipReason.END_GAME
+                            flipped[n, k] = FlipReason.END_GAME
 
         # randomly chose one enemy if stance are all positive
         if self.random_betrayal:
@@ -397,50 +916,102 @@ class ActionBasedStance(StanceExtraction):
                 if all(self.stance[n][k] >= 0 for k in self.nations):
                     flip_k = self.random.choice([k for k in self.nations if k != n])
                     self.stance[n][flip_k] = -1
-                    flipped[n][flip_k] = FlipReason.RANDOM
+                    flipped[n, flip_k] = FlipReason.RANDOM
 
-        if not verbose:
-            return self.stance
+        return flipped
 
-        log = {n: {k: "" for k in self.nations} for n in self.nations}
-        for n, k in product(self.nations, repeat=2):
-            if k == n:
-                continue
-            lines = [
-                f"My stance to {k} decays from {float(self.stance_prev[n][k]):0.2} to {float(self.discount * self.stance_prev[n][k]):0.2} by a factor {float(self.discount):0.2}."
-            ]
-            if hostility_to[n][k] != 0:
-                lines.append(
-                    f"My stance to {k} decreases by {float(hostility_to[n][k]):0.2} because of their hostile/conflict moves towards me."
-                )
-            if hostility_s_to[n][k] != 0:
-                lines.append(
-                    f"My stance to {k} decreases by {float(hostility_s_to[n][k]):0.2} because of their hostile/conflict support."
-                )
-            if friendship_to[n][k] != 0:
-                lines.append(
-                    f"My stance to {k} increases by {float(friendship_to[n][k]):0.2} because of receiving their support."
-                )
-            if friendship_ur_to[n][k] > 0:
-                lines.append(
-                    f"My stance to {k} increases by {float(friendship_ur_to[n][k]):0.2} because they could attack but didn't."
-                )
-            elif friendship_ur_to[n][k] < 0:
-                lines.append(
-                    f"My stance to {k} decreases by {float(friendship_ur_to[n][k]):0.2} because of they could be a threat."
-                )
-            if flipped[n][k] == FlipReason.RANDOM:
-                lines.append(
-                    f"My stance to {k} becomes {float(self.stance[n][k]):0.2} because I plan to betray {k} to break the peace."
-                )
-            elif flipped[n][k] == FlipReason.END_GAME:
-                lines.append(
-                    f"My stance to {k} becomes {float(self.stance[n][k]):0.2}, because I plan to betray everyone after year {self.year_threshold}."
-                )
-            lines.append(f"My final stance score to {k} is {float(self.stance[n][k]):0.2}.")
-            log[n][k] = "\n".join(lines)
+    def _update_stance_matrix(
+        self, features: PhaseFeatures, m_phase_name: str
+    ) -> Dict[Tuple[str, str], FlipReason]:
+        """
+        Vectorized counterpart of _update_stance_dict on the stance matrix.
+        The features extracted by this model are already held as arrays,
+        those extracted elsewhere, e.g. by stance_vector.parallel, are converted.
+        """
+        from .matrix import (
+            MatrixView,
+            as_matrix,
+            betrayal_candidates,
+            decay_and_accumulate,
+            flip_end_game,
+        )
+
+        nations = self.nations
+        assert self.stance_matrix is not None
+        self.feature_matrices = {
+            "hostility": as_matrix(features.hostility_to, nations),
+            "hostility_s": as_matrix(features.hostility_s_to, nations),
+            "friendship": as_matrix(features.friendship_to, nations),
+            "friendship_ur": as_matrix(features.friendship_ur_to, nations),
+        }
+        stance_prev = self.stance_matrix
+        stance = decay_and_accumulate(
+            stance_prev,
+            self.discount,
+            self.feature_matrices["hostility"],
+            self.feature_matrices["hostility_s"],
+            self.feature_matrices["friendship"],
+            self.feature_matrices["friendship_ur"],
+        )
+
+        flipped = {}
 
-        return self.stance, log  # type: ignore[return-value]
+        # simple heuristic to make all other countries enemies
+        m_phase_year = int(m_phase_name[1:5])
+        if self.end_game_flip:
+            if m_phase_year > self.year_threshold:
+                for i, j in zip(*flip_end_game(stance).nonzero()):
+                    flipped[nations[i], nations[j]] = FlipReason.END_GAME
+
+        # randomly chose one enemy if stance are all positive
+        if self.random_betrayal:
+            for i in betrayal_candidates(stance):
+                n = nations[i]
+                flip_k = self.random.choice([k for k in nations if k != n])
+                stance[i, nations.index(flip_k)] = -1
+                flipped[n, flip_k] = FlipReason.RANDOM
+
+        self.stance_matrix = stance
+        self.stance_prev = cast(Dict[str, Dict[str, float]], MatrixView(stance_prev, nations))
+        self.stance = cast(Dict[str, Dict[str, float]], MatrixView(stance, nations))
+        return flipped
+
+    def _save_state(self, writer: StateWriter) -> None:
+        """
+        Write the last movement phase consumed, the previous stances
+        and the state of the random generator.
+        """
+        writer.string(self.last_m_phase or "")
+        has_prev = hasattr(self, "stance_prev")
+        writer.pack("?", has_prev)
+        if has_prev:
+            writer.table(self.stance_prev)
+        writer.rng(self.random)
+
+    def _load_state(self, reader: StateReader, stance: Dict[str, Dict[str, float]]) -> None:
+        """Restore the fields written by _save_state, the explanations of the last update are lost."""
+        self.last_m_phase = reader.string() or None
+        (has_prev,) = reader.unpack("?")
+        stance_prev = reader.table(stance) if has_prev else None
+        reader.rng(self.random)
+
+        if self.numpy_engine:
+            from .matrix import MatrixView, to_matrix
+
+            self.stance_matrix = to_matrix(stance, self.nations)
+            stance = cast(Dict[str, Dict[str, float]], MatrixView(self.stance_matrix, self.nations))
+            if stance_prev is not None:
+                stance_prev = cast(
+                    Dict[str, Dict[str, float]],
+                    MatrixView(to_matrix(stance_prev, self.nations), self.nations),
+                )
+        self.stance = stance
+        if stance_prev is not None:
+            self.stance_prev = stance_prev
+        self._consumed_key = None
+        self._last_features = None
+        self._last_flipped = {}
+        self._last_log = None
 
     def update_stance(self, my_id: str, opp_id: str, value: float) -> None:
         """
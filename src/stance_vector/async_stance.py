@@ -0,0 +1,156 @@
+"""
+    Asyncio stance API
+
+    Computing stances is CPU-bound and would stall the event loop of a bot
+    for every game it hosts. AsyncStance reads what a stance model needs from the game
+    on the event loop, which only takes snapshots of its history, then runs the computation
+    in an executor. Concurrent requests for the same phase of a game share one computation,
+    which is cancelled when the game advances to another phase before it is ready.
+
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from diplomacy import Game
+
+from .action_based_stance import ActionBasedStance, StanceLog
+from .score_based_stance import ScoreBasedStance
+
+# stances and, for ActionBasedStance, the log of the last update
+StanceResult = Tuple[Dict[str, Dict[str, float]], Optional[StanceLog]]
+
+
+class AsyncStance:
+    """
+    Asyncio front of a stance model
+        model: the stance model, only used through this object from then on
+        executor: where the stances are computed, the default executor of the loop by default
+    Each phase of a game is computed once, as an ActionBasedStance in incremental mode would,
+    and repeated calls within the phase return the same result.
+    """
+
+    model: Union[ActionBasedStance, ScoreBasedStance]
+    executor: Optional[Executor]
+    _tasks: Dict[str, "_Computation"]
+    _lock: Optional[asyncio.Lock]
+
+    def __init__(
+        self,
+        model: Union[ActionBasedStance, ScoreBasedStance],
+        executor: Optional[Executor] = None,
+    ) -> None:
+        if isinstance(model, ActionBasedStance) and model.deepcopy_game:
+            raise ValueError(
+                "The game is read through snapshots of its history, it is never deep copied"
+            )
+        self.model = model
+        self.executor = executor
+        # game ID -> phase key and computation of the latest phase requested
+        self._tasks = {}
+        # created on first use, so that it belongs to the running loop
+        self._lock = None
+
+    async def get_stance(self, game: Game, verbose: bool = False) -> Any:
+        """
+        Extract the stances of nation n on nation k without blocking the event loop
+            game: the game, only read on the event loop
+            verbose: whether to also return the log of the update, as ActionBasedStance does
+        Returns a bi-level dictionary of stance score stance[n][k], with the log if verbose.
+        Raises asyncio.CancelledError if the game advanced to another phase
+        before the stances of this one were ready.
+        """
+        key = (game.current_short_phase, len(game.state_history))
+        pending = self._tasks.get(game.game_id)
+        if pending is None or pending.key != key:
+            if pending is not None:
+                # the phase advanced, nobody needs the stances of the previous one anymore
+                pending.task.cancel()
+            pending = _Computation(key, verbose)
+            pending.task = asyncio.ensure_future(self._compute(game, pending))
+            self._tasks[game.game_id] = pending
+        elif verbose:
+            pending.verbose = True
+        # a caller being cancelled does not cancel the computation shared with others
+        stance, log = await asyncio.shield(pending.task)
+        if not verbose:
+            return stance
+        if log is None and isinstance(self.model, ActionBasedStance):
+            # joined a computation that ended without the log, which holds until the next one
+            if self._tasks.get(game.game_id) is not pending or self._locked():
+                raise asyncio.CancelledError()
+            log = self.model.get_log()
+        return stance, log
+
+    def _locked(self) -> bool:
+        return self._lock is not None and self._lock.locked()
+
+    async def _compute(self, game: Game, computation: "_Computation") -> StanceResult:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # the model is updated by one computation at a time
+        async with self._lock:
+            compute = self._read(game, computation)
+            future = asyncio.get_running_loop().run_in_executor(self.executor, compute)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # the running call cannot be interrupted, hold the model until it returns
+                await asyncio.wait([future])
+                raise
+
+    def _read(self, game: Game, computation: "_Computation") -> Callable[[], StanceResult]:
+        """
+        Read what the model needs from the game, on the event loop,
+        and return the computation to run in the executor.
+        """
+        model = self.model
+        phase = computation.key[0]
+        if isinstance(model, ScoreBasedStance):
+            model.game = game
+            scores = model.extract_scores()
+
+            def compute_scores() -> StanceResult:
+                with model._instrumented_call("get_stance", phase):
+                    with model._stage("update"):
+                        return model.update_scores(scores), None
+
+            return compute_scores
+
+        if model.incremental:
+            new_phases = model.read_new_m_phases(game)
+        else:
+            model.game = game
+            new_phases = None
+            m_phase_data = model.get_prev_m_snapshot()
+
+        def compute_stances() -> StanceResult:
+            with model._instrumented_call("get_stance", phase):
+                if new_phases is not None:
+                    model.apply_new_m_phases(new_phases)
+                else:
+                    model.consume_m_phase(m_phase_data)
+                if not computation.verbose:
+                    return model.stance, None
+                with model._stage("log"):
+                    return model.stance, model.get_log()
+
+        return compute_stances
+
+
+class _Computation:
+    """
+    The computation of the stances of a phase, shared by the requests for it
+        key: the phase of the game and the length of its history
+        verbose: whether a request wants the log of the update
+        task: the computation
+    """
+
+    key: Tuple[str, int]
+    verbose: bool
+    task: "asyncio.Future[StanceResult]"
+
+    def __init__(self, key: Tuple[str, int], verbose: bool) -> None:
+        self.key = key
+        self.verbose = verbose
@@ -0,0 +1,392 @@
+"""
+    Corpus runner
+
+    Computes stance trajectories over a corpus of saved games, such as the turn-level logs in
+    https://github.com/DenisPeskov/2020_acl_diplomacy/blob/master/utils/ExtraGameData.zip
+
+    Games are read from a directory or a zip archive of .json files (one saved game each)
+    or .jsonl files (one saved game per line), fanned out over a process pool,
+    and their results are appended to a JSONL file as they complete.
+    Games already in the output file are skipped, so an interrupted run can be resumed.
+
+    Usage: python -m stance_vector.corpus ExtraGameData.zip stances.jsonl --workers 8
+
+"""
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+import io
+from itertools import groupby, islice
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import time
+import traceback
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+)
+import zipfile
+
+from .action_based_stance import ActionBasedStance
+from .game_log import GameLog
+from .score_based_stance import ScoreBasedStance
+
+LOGGER = logging.getLogger(__name__)
+
+# Number of games sent to a worker at once
+BATCH_SIZE = 8
+
+
+class GameSource(NamedTuple):
+    """
+    Location of a saved game in a corpus
+        path: the file or zip archive holding the game
+        member: the file in the zip archive, empty for files on disk
+        line: the line of the game in a .jsonl file, -1 for .json files
+        offset: the byte offset of the line in a .jsonl file on disk, -1 otherwise
+    """
+
+    path: str
+    member: str
+    line: int
+    offset: int = -1
+
+    @property
+    def key(self) -> str:
+        """Identifier of the game in the output file."""
+        name = os.path.join(self.path, self.member) if self.member else self.path
+        return f"{name}:{self.line}" if self.line >= 0 else name
+
+
+def _read_lines(file: IO[bytes], source: GameSource, seekable: bool) -> Iterator[GameSource]:
+    offset = 0
+    for i, line in enumerate(file):
+        if line.strip():
+            yield source._replace(line=i, offset=offset if seekable else -1)
+        offset += len(line)
+
+
+def iter_game_sources(corpus: str) -> Iterator[GameSource]:
+    """List the saved games of a corpus directory or zip archive, in a deterministic order."""
+    if zipfile.is_zipfile(corpus):
+        with zipfile.ZipFile(corpus) as archive:
+            for member in sorted(archive.namelist()):
+                if member.endswith(".jsonl"):
+                    with archive.open(member) as file:
+                        yield from _read_lines(file, GameSource(corpus, member, -1), False)
+                elif member.endswith(".json"):
+                    yield GameSource(corpus, member, -1)
+        return
+    paths = [Path(corpus)] if os.path.isfile(corpus) else sorted(Path(corpus).rglob("*"))
+    for path in paths:
+        if path.suffix == ".jsonl":
+            with open(path, "rb") as file:
+                yield from _read_lines(file, GameSource(str(path), "", -1), True)
+        elif path.suffix == ".json":
+            yield GameSource(str(path), "", -1)
+
+
+@contextmanager
+def open_game_log(source: GameSource) -> Iterator[TextIO]:
+    """
+    Open the saved game at a corpus location as a text stream.
+    A line of a .jsonl file on disk is read at its offset, that of a zip member,
+    which cannot be seeked into, after every line before it, see iter_game_batches.
+    """
+    with ExitStack() as stack:
+        if source.offset >= 0:
+            binary = stack.enter_context(open(source.path, "rb"))
+            binary.seek(source.offset)
+            yield io.StringIO(binary.readline().decode("utf-8"))
+            return
+        if source.member:
+            archive = stack.enter_context(zipfile.ZipFile(source.path))
+            file: TextIO = io.TextIOWrapper(
+                stack.enter_context(archive.open(source.member)), encoding="utf-8"
+            )
+        else:
+            file = stack.enter_context(open(source.path, encoding="utf-8"))
+        if source.line >= 0:
+            file = io.StringIO(next(islice(file, source.line, None)))
+        yield file
+
+
+def _read_member_lines(sources: List[GameSource]) -> Iterator[Tuple[GameSource, Optional[str]]]:
+    """Read the games of a .jsonl member of a zip archive in one pass over the member."""
+    wanted = {source.line: source for source in sources}
+    with zipfile.ZipFile(sources[0].path) as archive:
+        with archive.open(sources[0].member) as file:
+            for i, line in enumerate(file):
+                source = wanted.pop(i, None)
+                if source is not None:
+                    yield source, line.decode("utf-8")
+                if not wanted:
+                    return
+
+
+def iter_game_batches(
+    sources: Iterable[GameSource], size: int = BATCH_SIZE
+) -> Iterator[List[Tuple[GameSource, Optional[str]]]]:
+    """
+    Group the games of a corpus into batches of work, in order
+        sources: the games, as listed by iter_game_sources
+        size: the number of games of a batch
+    The games of a .jsonl member of a zip archive come with their text, read here
+    in one pass over the member, the other games are read by process_games.
+    """
+    batch: List[Tuple[GameSource, Optional[str]]] = []
+    for (_, member), group in groupby(sources, key=lambda source: (source.path, source.member)):
+        group_sources = list(group)
+        games: Iterable[Tuple[GameSource, Optional[str]]]
+        if member and group_sources[0].line >= 0:
+            games = _read_member_lines(group_sources)
+        else:
+            games = ((source, None) for source in group_sources)
+        for game in games:
+            batch.append(game)
+            if len(batch) == size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def process_game(
+    source: GameSource, stance_options: Dict[str, Any], feature_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Compute the stance trajectories of one saved game
+        source: location of the game
+        stance_options: keyword arguments of ActionBasedStance
+        feature_dir: directory to write the feature tensor of the game to, if any,
+                     see stance_vector.features
+    Returns a JSON-serializable record with the action-based and score-based stances
+    of every movement phase, the path of the feature tensor and the time it took
+    The phases are streamed from the log, see stance_vector.game_log, and never adjudicated.
+    The log is decoded once, each movement phase being read by every model in turn.
+    """
+    with open_game_log(source) as file:
+        return _process_log(source, file, stance_options, feature_dir)
+
+
+def process_games(
+    games: List[Tuple[GameSource, Optional[str]]],
+    stance_options: Dict[str, Any],
+    feature_dir: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Compute the stance trajectories of a batch of games, see iter_game_batches
+        games: the location of each game, with its text if it was already read
+        stance_options: keyword arguments of ActionBasedStance
+        feature_dir: directory to write the feature tensors to, if any
+    Returns the records of the games, as process_game, and those of the failed games
+    with the traceback under "error"
+    """
+    records = []
+    for source, text in games:
+        try:
+            if text is None:
+                records.append(process_game(source, stance_options, feature_dir))
+            else:
+                records.append(_process_log(source, io.StringIO(text), stance_options, feature_dir))
+        except Exception:
+            records.append({"game": source.key, "error": traceback.format_exc()})
+    return records
+
+
+def _process_log(
+    source: GameSource,
+    file: TextIO,
+    stance_options: Dict[str, Any],
+    feature_dir: Optional[str],
+) -> Dict[str, Any]:
+    """Body of process_game, on the opened game log."""
+    start = time.perf_counter()
+    game_log = GameLog(file)
+    nations = sorted(game_log.get_map_power_names())
+    action_stance = ActionBasedStance(nations[0], game_log, **stance_options)
+    score_stance = ScoreBasedStance(nations[0], game_log)
+    action_trajectory = {}
+    score_trajectory = {}
+    if feature_dir is not None:
+        from .features import extract_phase_counts, stack_phase_counts
+
+        feature_model = ActionBasedStance(nations[0], game_log)
+        feature_counts = []
+    # the log is decoded once, each movement phase feeding every consumer
+    for m_phase_data in game_log.iter_m_snapshots():
+        name = m_phase_data.name
+        action_stance.consume_m_phase(m_phase_data)
+        action_trajectory[name] = {n: dict(row) for n, row in action_stance.stance.items()}
+        score = score_stance.update_scores(
+            score_stance.extract_scores(m_phase_data.state["centers"])
+        )
+        score_trajectory[name] = {n: dict(score[n]) for n in nations}
+        if feature_dir is not None:
+            feature_counts.append(extract_phase_counts(feature_model, m_phase_data))
+    record: Dict[str, Any] = {
+        "game": source.key,
+        "game_id": game_log.game_id,
+        "map": game_log.map_name,
+        "action_stance": action_trajectory,
+        "score_stance": score_trajectory,
+    }
+    if feature_dir is not None:
+        from .features import save_feature_tensor
+
+        record["features"] = os.path.join(feature_dir, re.sub(r"[^\w.-]", "_", source.key) + ".npz")
+        tensor = stack_phase_counts(list(action_trajectory), nations, feature_counts)
+        save_feature_tensor(tensor, record["features"])
+    record["seconds"] = time.perf_counter() - start
+    return record
+
+
+def completed_games(output: str) -> Set[str]:
+    """
+    Find the games already in an output file.
+    A line left incomplete by an interrupted run is dropped from the file.
+    """
+    if not os.path.exists(output):
+        return set()
+    done = set()
+    records = []
+    with open(output, encoding="utf-8") as file:
+        lines = file.readlines()
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        done.add(record["game"])
+        records.append(line if line.endswith("\n") else line + "\n")
+    if len(records) != len(lines) or (lines and not lines[-1].endswith("\n")):
+        with open(output, "w", encoding="utf-8") as file:
+            file.writelines(records)
+    return done
+
+
+def run_corpus(
+    corpus: str,
+    output: str,
+    workers: Optional[int] = None,
+    resume: bool = True,
+    feature_dir: Optional[str] = None,
+    **stance_options: Any,
+) -> Dict[str, float]:
+    """
+    Compute the stance trajectories of every game of a corpus
+        corpus: directory or zip archive of saved games
+        output: JSONL file the game records are appended to as they complete
+        workers: number of worker processes, all cores by default, 1 to run in this process
+        resume: skip the games already in the output file, otherwise overwrite it
+        feature_dir: directory to write the feature tensor of each game to, if any
+        stance_options: keyword arguments of ActionBasedStance
+    Returns a dict of the seconds taken by each processed game
+    Games that fail are logged and left out of the output, so they are retried on resume.
+    """
+    if resume:
+        done = completed_games(output)
+    else:
+        done = set()
+        open(output, "w").close()
+    sources = [source for source in iter_game_sources(corpus) if source.key not in done]
+    if feature_dir is not None:
+        os.makedirs(feature_dir, exist_ok=True)
+    LOGGER.info("%d games to process, %d already done", len(sources), len(done))
+
+    timings = {}
+    with open(output, "a", encoding="utf-8") as file:
+
+        def write(record: Dict[str, Any]) -> None:
+            if "error" in record:
+                LOGGER.error("%s failed\n%s", record["game"], record["error"])
+                return
+            file.write(json.dumps(record) + "\n")
+            file.flush()
+            timings[record["game"]] = record["seconds"]
+            LOGGER.info("%s: %.3fs", record["game"], record["seconds"])
+
+        batches = iter_game_batches(sources)
+        if workers == 1:
+            for batch in batches:
+                for record in process_games(batch, stance_options, feature_dir):
+                    write(record)
+            return timings
+
+        # the batches are read as they are submitted, a few ahead of the workers
+        max_pending = 2 * (workers or os.cpu_count() or 1)
+        pending: Dict["Future[List[Dict[str, Any]]]", List[GameSource]] = {}
+
+        def collect() -> None:
+            done_futures, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done_futures:
+                batch_sources = pending.pop(future)
+                try:
+                    for record in future.result():
+                        write(record)
+                except Exception:
+                    LOGGER.exception("%s failed", ", ".join(source.key for source in batch_sources))
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for batch in batches:
+                if len(pending) >= max_pending:
+                    collect()
+                future = executor.submit(process_games, batch, stance_options, feature_dir)
+                pending[future] = [source for source, _ in batch]
+            while pending:
+                collect()
+    return timings
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command-line entry point of the corpus runner."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1].strip())
+    parser.add_argument("corpus", help="directory or zip archive of saved games")
+    parser.add_argument("output", help="JSONL file to write the stances to")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument(
+        "--no-resume", action="store_true", help="overwrite the output instead of resuming"
+    )
+    parser.add_argument(
+        "--features", default=None, help="directory to write the feature tensors to (numpy)"
+    )
+    parser.add_argument("--discount-factor", type=float, default=0.5)
+    parser.add_argument("--year-threshold", type=int, default=1918)
+    parser.add_argument("--no-end-game-flip", action="store_true")
+    parser.add_argument("--no-random-betrayal", action="store_true")
+    parser.add_argument("--random-seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    timings = run_corpus(
+        args.corpus,
+        args.output,
+        workers=args.workers,
+        resume=not args.no_resume,
+        feature_dir=args.features,
+        discount_factor=args.discount_factor,
+        year_threshold=args.year_threshold,
+        end_game_flip=not args.no_end_game_flip,
+        random_betrayal=not args.no_random_betrayal,
+        random_seed=args.random_seed,
+    )
+    total: List[float] = list(timings.values())
+    LOGGER.info("processed %d games in %.3fs of compute", len(total), sum(total))
+
+
+if __name__ == "__main__":
+    main()
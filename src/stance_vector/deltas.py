@@ -0,0 +1,186 @@
+"""
+    Discounted stance queries
+
+    Without its betrayal heuristics, ActionBasedStance follows the linear recurrence
+    stance[t] = discount * stance[t - 1] + delta[t], where delta[t] is the net action score
+    of movement phase t. The stance at phase t is then the exponentially weighted sum
+    discount ** t * stance[0] + sum(discount ** (t - i) * delta[i] for i <= t).
+    A DeltaIndex stores the deltas of a game once, along with prefix scans of them,
+    so that the stance at any phase, the part of it due to a window of phases and
+    the average stance over a window are answered in O(1), under any discount factor
+    at the cost of one scan per factor. Requires numpy, an optional dependency:
+    pip install stance_vector[numpy]
+
+"""
+
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .features import FeatureTensor
+from .sweep import SweepSetting
+
+# order of the seasons and phase types within a year
+_SEASONS = {"S": 0, "F": 1, "W": 2}
+_PHASE_TYPES = {"M": 0, "R": 1, "A": 2}
+
+Phase = Union[int, str]
+
+
+def phase_order(phase_name: str) -> Tuple[int, int, int]:
+    """Sort key of a short phase name such as "F1901M", in the order the phases are played."""
+    return int(phase_name[1:-1]), _SEASONS[phase_name[0]], _PHASE_TYPES[phase_name[-1]]
+
+
+class _Scan:
+    """Prefix scans of the deltas under one discount factor."""
+
+    def __init__(self, deltas: np.ndarray, discount: float, initial: float) -> None:
+        n_phases = len(deltas)
+        # stances[t] is the stance after t phases
+        stances = np.empty((n_phases + 1,) + deltas.shape[1:])
+        stances[0] = initial
+        for t in range(n_phases):
+            stances[t + 1] = discount * stances[t] + deltas[t]
+        self.discount = discount
+        self.stances = stances
+        # stance_sums[t] is the sum of the stances after 1 to t phases
+        self.stance_sums = np.concatenate(
+            [np.zeros((1,) + deltas.shape[1:]), np.cumsum(stances[1:], axis=0)]
+        )
+
+
+class DeltaIndex:
+    """
+    Per-phase stance deltas of a game, with prefix scans answering stance queries
+        phases: the names of the movement phases
+        nations: the sorted nations, the axes of the stance matrices
+        deltas: [phases, N, N] array, the net action score of k towards n in each phase
+        discount: the discount factor of queries not giving one
+        initial: the stances before the first phase
+    Phases are given by their name or index, -1 standing for the start of the game.
+    A phase name that is not a movement phase stands for the last movement phase before it,
+    found by bisection.
+    """
+
+    phases: List[str]
+    nations: List[str]
+    deltas: np.ndarray
+    discount: float
+    initial: float
+    _phase_index: Dict[str, int]
+    _phase_keys: List[Tuple[int, int, int]]
+    _delta_sums: np.ndarray
+    _scans: Dict[float, _Scan]
+
+    def __init__(
+        self,
+        phases: List[str],
+        nations: List[str],
+        deltas: np.ndarray,
+        discount: float = 0.5,
+        initial: float = 0.1,
+    ) -> None:
+        self.phases = list(phases)
+        self.nations = list(nations)
+        self.deltas = np.asarray(deltas, dtype=np.float64)
+        self.discount = discount
+        self.initial = initial
+        self._phase_index = {phase_name: t for t, phase_name in enumerate(self.phases)}
+        self._phase_keys = [phase_order(phase_name) for phase_name in self.phases]
+        # delta_sums[t] is the sum of the deltas of the first t phases
+        self._delta_sums = np.concatenate(
+            [np.zeros((1,) + self.deltas.shape[1:]), np.cumsum(self.deltas, axis=0)]
+        )
+        self._scans = {}
+
+    @classmethod
+    def from_tensor(
+        cls, tensor: FeatureTensor, setting: SweepSetting = SweepSetting(), initial: float = 0.1
+    ) -> "DeltaIndex":
+        """
+        Weigh the action counts of a game into deltas
+            tensor: the action counts of the game, see stance_vector.features
+            setting: the coefficients and discount factor of ActionBasedStance,
+                     whose year threshold is not used
+            initial: the stances before the first phase
+        """
+        weights = np.array(
+            [
+                -setting.invasion_coef,
+                -setting.conflict_coef,
+                -setting.invasive_support_coef,
+                -setting.conflict_support_coef,
+                setting.friendly_coef,
+                setting.unrealized_coef,
+            ]
+        )
+        deltas = np.asarray(tensor.counts, dtype=np.float64) @ weights
+        return cls(tensor.phases, tensor.nations, deltas, setting.discount_factor, initial)
+
+    def phase_index(self, phase: Phase) -> int:
+        """
+        Get the index of a movement phase, or of the last one before a phase name,
+        -1 before the first movement phase
+        """
+        if isinstance(phase, int):
+            if not -1 <= phase < len(self.phases):
+                raise IndexError(f"Phase {phase} out of {len(self.phases)} movement phases")
+            return phase
+        index = self._phase_index.get(phase)
+        if index is not None:
+            return index
+        return bisect_right(self._phase_keys, phase_order(phase)) - 1
+
+    def _scan(self, discount: Optional[float]) -> _Scan:
+        discount = self.discount if discount is None else discount
+        scan = self._scans.get(discount)
+        if scan is None:
+            scan = self._scans[discount] = _Scan(self.deltas, discount, self.initial)
+        return scan
+
+    def stance(self, phase: Phase, discount: Optional[float] = None) -> np.ndarray:
+        """
+        Get the stances after a movement phase, as an N x N array
+            phase: the movement phase
+            discount: the discount factor, that of the index by default
+        """
+        stance: np.ndarray = self._scan(discount).stances[self.phase_index(phase) + 1]
+        return stance
+
+    def stance_of(
+        self, nation: str, opponent: str, phase: Phase, discount: Optional[float] = None
+    ) -> float:
+        """Get the stance of a nation towards an opponent after a movement phase."""
+        i, j = self.nations.index(nation), self.nations.index(opponent)
+        return float(self.stance(phase, discount)[i, j])
+
+    def window_stance(
+        self, start: Phase, end: Phase, discount: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Get the part of the stances after the end phase due to the movement phases
+        from start to end, as stance[end] - discount ** (end - start + 1) * stance[start - 1]
+        """
+        scan = self._scan(discount)
+        t_start, t_end = max(self.phase_index(start), 0), self.phase_index(end) + 1
+        window: np.ndarray = (
+            scan.stances[t_end] - scan.discount ** (t_end - t_start) * scan.stances[t_start]
+        )
+        return window
+
+    def mean_stance(self, start: Phase, end: Phase, discount: Optional[float] = None) -> np.ndarray:
+        """Get the average of the stances after each movement phase from start to end included."""
+        scan = self._scan(discount)
+        t_start, t_end = max(self.phase_index(start), 0), self.phase_index(end) + 1
+        if t_end <= t_start:
+            raise ValueError(f"Empty window from {start} to {end}")
+        mean: np.ndarray = (scan.stance_sums[t_end] - scan.stance_sums[t_start]) / (t_end - t_start)
+        return mean
+
+    def delta_sum(self, start: Phase, end: Phase) -> np.ndarray:
+        """Get the undiscounted sum of the deltas of the movement phases from start to end."""
+        t_start, t_end = max(self.phase_index(start), 0), self.phase_index(end) + 1
+        delta_sum: np.ndarray = self._delta_sums[t_end] - self._delta_sums[min(t_start, t_end)]
+        return delta_sum
@@ -0,0 +1,131 @@
+"""
+    Action feature tensors
+
+    The action counts behind ActionBasedStance, for every movement phase of a game,
+    as one dense float array, written to .npz or memory-mappable .npy files.
+    Requires numpy, an optional dependency: pip install stance_vector[numpy]
+    Saved tensors can be loaded and swept, see stance_vector.sweep, without the diplomacy engine.
+
+"""
+
+import json
+from typing import TYPE_CHECKING, List, NamedTuple, Union
+
+import numpy as np
+
+from .matrix import to_matrix
+
+if TYPE_CHECKING:
+    from diplomacy import Game
+
+    from .action_based_stance import ActionBasedStance
+    from .game_log import GameLog
+    from .stance_extraction import PhaseSnapshot
+
+# Names of the last axis of a feature tensor, the fields of action_based_stance.FeatureCounts
+FEATURE_NAMES = (
+    "hostile_moves",
+    "conflict_moves",
+    "hostile_supports",
+    "conflict_supports",
+    "friendly_supports",
+    "unrealized_moves",
+)
+
+
+class FeatureTensor(NamedTuple):
+    """
+    Action counts of every movement phase of a game
+        phases: names of the movement phases, the first axis of counts
+        nations: sorted nations, the second (n) and third (k) axes of counts
+        counts: [phases, N, N, features] array, such that counts[p, i(n), i(k), f] is
+                the count of feature FEATURE_NAMES[f] of k's actions towards n in phase p
+    """
+
+    phases: List[str]
+    nations: List[str]
+    counts: np.ndarray
+
+
+def extract_feature_tensor(game: Union["Game", "GameLog"]) -> FeatureTensor:
+    """
+    Extract the action counts of every movement phase of a game in one pass over its history
+        game: the game, or a saved game log read with stance_vector.game_log.GameLog
+    Returns the feature tensor of the game
+    """
+    from .action_based_stance import ActionBasedStance
+
+    nations = sorted(game.get_map_power_names())
+    model = ActionBasedStance(nations[0], game)
+    phases = []
+    counts = []
+    for m_phase_data in model.iter_m_snapshots(game):
+        phases.append(m_phase_data.name)
+        counts.append(extract_phase_counts(model, m_phase_data))
+    return stack_phase_counts(phases, nations, counts)
+
+
+def extract_phase_counts(model: "ActionBasedStance", m_phase_data: "PhaseSnapshot") -> np.ndarray:
+    """
+    Extract the action counts of one movement phase, as an [N, N, features] array
+        model: an ActionBasedStance computing every stance, whose coefficients are not used
+        m_phase_data: the movement phase
+    """
+    model.territories = model.extract_terr(m_phase_data)
+    phase_counts = model.extract_feature_counts(m_phase_data)
+    return np.stack([to_matrix(table, model.nations) for table in phase_counts], axis=-1)
+
+
+def stack_phase_counts(
+    phases: List[str], nations: List[str], counts: List[np.ndarray]
+) -> FeatureTensor:
+    """Stack the action counts of the movement phases of a game into its feature tensor."""
+    tensor = (
+        np.stack(counts)
+        if counts
+        else np.zeros((0, len(nations), len(nations), len(FEATURE_NAMES)))
+    )
+    return FeatureTensor(phases, nations, tensor)
+
+
+def save_feature_tensor(tensor: FeatureTensor, path: str) -> None:
+    """
+    Write a feature tensor to disk
+        tensor: the feature tensor
+        path: a .npz file holding the counts along with their index,
+              or a .npy file holding the counts, with the index in a JSON file at path + ".json"
+    The counts of a .npy file can be memory-mapped when loaded, see load_feature_tensor.
+    """
+    if path.endswith(".npz"):
+        np.savez(
+            path,
+            counts=tensor.counts,
+            phases=np.array(tensor.phases, dtype=str),
+            nations=np.array(tensor.nations, dtype=str),
+            features=np.array(FEATURE_NAMES, dtype=str),
+        )
+        return
+    np.save(path, tensor.counts)
+    with open(path + ".json", "w", encoding="utf-8") as file:
+        json.dump(
+            {"phases": tensor.phases, "nations": tensor.nations, "features": FEATURE_NAMES}, file
+        )
+
+
+def load_feature_tensor(path: str, mmap: bool = True) -> FeatureTensor:
+    """
+    Read a feature tensor written by save_feature_tensor
+        path: the .npz or .npy file
+        mmap: whether to memory-map the counts of a .npy file instead of reading them
+    """
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            if tuple(data["features"]) != FEATURE_NAMES:
+                raise ValueError(f"Unknown features in {path}: {list(data['features'])}")
+            return FeatureTensor(data["phases"].tolist(), data["nations"].tolist(), data["counts"])
+    with open(path + ".json", encoding="utf-8") as file:
+        index = json.load(file)
+    if tuple(index["features"]) != FEATURE_NAMES:
+        raise ValueError(f"Unknown features in {path}: {index['features']}")
+    counts = np.load(path, mmap_mode="r" if mmap else None)
+    return FeatureTensor(index["phases"], index["nations"], counts)
@@ -0,0 +1,160 @@
+"""
+    Streaming game-log reader
+
+    Reads the phases of a saved game (diplomacy.utils.export.to_saved_game_format)
+    straight from its JSON, one phase at a time, without building a diplomacy.Game.
+    The stance models accept a GameLog wherever they walk the history of a game,
+    see StanceExtraction.iter_m_snapshots.
+
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from diplomacy.engine.map import Map
+
+from .stance_extraction import PhaseSnapshot
+
+# Number of characters read from the log at a time
+READ_SIZE = 1 << 16
+
+_WHITESPACE = " \t\n\r"
+
+
+class _JSONStream:
+    """Incremental decoder of the values of a JSON text read from a file in chunks."""
+
+    def __init__(self, file: TextIO) -> None:
+        self.file = file
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        """Read another chunk, dropping what was consumed. Returns False at the end of the file."""
+        if self.eof:
+            return False
+        chunk = self.file.read(READ_SIZE)
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, empty at the end of the file."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos : self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Invalid game log: expected {char!r} at {self.peek()!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # a number may continue in the next chunk
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+class GameLog:
+    """
+    A saved game read lazily from a file
+        game_id: the id of the game
+        map_name: the name of the map
+        rules: the rules of the game
+        map: the map of the game
+    The header (everything before the phases) is read on construction, and must hold the map,
+    the phases are read while iterating over them, which can only be done once.
+    """
+
+    game_id: Optional[str]
+    map_name: str
+    rules: List[str]
+    map: Map
+
+    def __init__(self, file: TextIO) -> None:
+        self._stream = _JSONStream(file)
+        self._consumed = False
+        header: Dict[str, Any] = {}
+        self._stream.expect("{")
+        self._in_phases = False
+        while self._stream.peek() not in {"}", ""}:
+            key = self._stream.value()
+            self._stream.expect(":")
+            if key == "phases":
+                if "map" not in header:
+                    # the phases are streamed, the keys after them are never read
+                    raise ValueError("Invalid game log: the map must precede the phases")
+                self._stream.expect("[")
+                self._in_phases = True
+                break
+            header[key] = self._stream.value()
+            if self._stream.peek() == ",":
+                self._stream.expect(",")
+        self.game_id = header.get("id")
+        self.map_name = header.get("map", "standard")
+        self.rules = header.get("rules", [])
+        self.map = Map(self.map_name)
+
+    def get_map_power_names(self) -> List[str]:
+        """The powers of the game, as diplomacy.Game.get_map_power_names."""
+        powers: List[str] = self.map.powers
+        return powers
+
+    def iter_phases(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the saved phases, each decoded when it is reached.
+        The last phase is the current phase of the game, whose orders were not processed.
+        """
+        if self._consumed:
+            raise RuntimeError("The phases of a game log can only be read once")
+        self._consumed = True
+        if not self._in_phases:
+            return
+        stream = self._stream
+        while stream.peek() != "]":
+            yield stream.value()
+            if stream.peek() == ",":
+                stream.expect(",")
+
+    def iter_m_snapshots(self) -> Iterator[PhaseSnapshot]:
+        """
+        Yield a snapshot of each processed movement phase in order,
+        as StanceExtraction.iter_m_snapshots does for the history of a diplomacy.Game.
+        At most the snapshot and the following phase are held in memory.
+        """
+        pending: Optional[Tuple[str, Dict[str, Any]]] = None
+        for phase in self.iter_phases():
+            if pending is not None:
+                yield self._snapshot(*pending)
+                pending = None
+            if phase["name"].endswith("M"):
+                pending = (phase["name"], phase)
+
+    def _snapshot(self, name: str, phase: Dict[str, Any]) -> PhaseSnapshot:
+        state = phase["state"]
+        return PhaseSnapshot(
+            name=name,
+            state={
+                "units": state["units"],
+                "retreats": state["retreats"],
+                "centers": state["centers"],
+            },
+            orders=phase.get("orders") or {},
+            map=self.map,
+        )
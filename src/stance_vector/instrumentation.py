@@ -0,0 +1,147 @@
+"""
+    Stage instrumentation
+
+    Records the wall time, call count and memory block allocations of each stage
+    of the stance computations, per get_stance call.
+    Attach an Instrumentation to a stance model to enable it:
+        stance_model.instrumentation = Instrumentation(callback=print)
+
+"""
+
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Blocks allocated by the interpreter, only reported by CPython
+_allocated_blocks: Callable[[], int] = getattr(sys, "getallocatedblocks", lambda: 0)
+
+
+class StageStats:
+    """
+    Totals of a stage within one call
+        seconds: wall time spent in the stage
+        calls: number of times the stage ran
+        allocations: net number of memory blocks allocated by the stage
+    """
+
+    __slots__ = ("seconds", "calls", "allocations")
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+        self.calls = 0
+        self.allocations = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"seconds": self.seconds, "calls": self.calls, "allocations": self.allocations}
+
+
+class _Stage:
+    """Context manager adding the time and allocations of a stage to its stats."""
+
+    __slots__ = ("stats", "start", "blocks")
+
+    def __init__(self, stats: StageStats) -> None:
+        self.stats = stats
+
+    def __enter__(self) -> None:
+        self.blocks = _allocated_blocks()
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stats.seconds += time.perf_counter() - self.start
+        self.stats.allocations += _allocated_blocks() - self.blocks
+        self.stats.calls += 1
+
+
+class _Call:
+    """Context manager recording one instrumented call."""
+
+    __slots__ = ("instrumentation", "name", "phase", "stages", "stage")
+
+    def __init__(self, instrumentation: "Instrumentation", name: str, phase: str) -> None:
+        self.instrumentation = instrumentation
+        self.name = name
+        self.phase = phase
+
+    def __enter__(self) -> None:
+        self.stages: Dict[str, StageStats] = {}
+        self.instrumentation._stages = self.stages
+        self.stage = _Stage(StageStats())
+        self.stage.__enter__()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stage.__exit__()
+        instrumentation = self.instrumentation
+        record = {
+            "call": self.name,
+            "phase": self.phase,
+            **self.stage.stats.as_dict(),
+            "stages": {name: stats.as_dict() for name, stats in self.stages.items()},
+        }
+        instrumentation._stages = None
+        if instrumentation.keep:
+            instrumentation.records.append(record)
+        if instrumentation.callback is not None:
+            instrumentation.callback(record)
+
+
+class Instrumentation:
+    """
+    Per-call stage timings of a stance model
+        callback: called with the record of each call as it completes
+        keep: whether to keep the records in self.records
+    A record is a dict with the name of the call, the phase of the game, its totals
+    (seconds, calls, allocations) and the totals of each stage it ran under "stages".
+    The stages of the stance models run one after the other, so their times do not overlap.
+    """
+
+    callback: Optional[Callable[[Dict[str, Any]], None]]
+    keep: bool
+    records: List[Dict[str, Any]]
+    _stages: Optional[Dict[str, StageStats]]
+
+    def __init__(
+        self, callback: Optional[Callable[[Dict[str, Any]], None]] = None, keep: bool = True
+    ) -> None:
+        self.callback = callback
+        self.keep = keep
+        self.records = []
+        self._stages = None
+
+    def call(self, name: str, phase: str) -> _Call:
+        """Context manager recording a call of a stance model, e.g. get_stance."""
+        return _Call(self, name, phase)
+
+    def stage(self, name: str) -> Any:
+        """Context manager timing a stage of the current call, a no-op outside calls."""
+        if self._stages is None:
+            return NULL_STAGE
+        stats = self._stages.get(name)
+        if stats is None:
+            stats = self._stages[name] = StageStats()
+        return _Stage(stats)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Export the records along with the totals of each stage over all of them."""
+        totals: Dict[str, Dict[str, Any]] = {}
+        for record in self.records:
+            for name, stats in record["stages"].items():
+                total = totals.setdefault(name, {"seconds": 0.0, "calls": 0, "allocations": 0})
+                for key, value in stats.items():
+                    total[key] += value
+        return {"calls": list(self.records), "totals": totals}
+
+
+class _NullStage:
+    """Context manager doing nothing, shared by every disabled stage."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+NULL_STAGE = _NullStage()
@@ -0,0 +1,99 @@
+"""
+    Precomputed map tables
+
+    Adjacency lookups through diplomacy's Map normalize location strings on every call.
+    The tables here are compiled once per map name into a descriptor shared by the whole process,
+    and the least recently used descriptors are evicted beyond MAP_CACHE_SIZE maps.
+
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, NamedTuple, Tuple
+
+from diplomacy.engine.map import Map
+
+# Number of maps whose descriptors are kept in the process-wide cache
+MAP_CACHE_SIZE = 32
+
+
+class MapDescriptor(NamedTuple):
+    """
+    Tables derived from a map, shared by every stance model on it
+        name: the name of the map
+        powers: the sorted powers of the map
+        power_index: power -> its index in powers
+        locs: the upper-case locations of the map
+        loc_index: location -> its index in locs
+        army_moves: location -> locations an army there can move to
+        home_centers: power -> its home supply centers
+    """
+
+    name: str
+    powers: Tuple[str, ...]
+    power_index: Dict[str, int]
+    locs: Tuple[str, ...]
+    loc_index: Dict[str, int]
+    army_moves: Dict[str, Tuple[str, ...]]
+    home_centers: Dict[str, Tuple[str, ...]]
+
+
+# map name -> descriptor, in order of last use
+_DESCRIPTORS: "OrderedDict[str, MapDescriptor]" = OrderedDict()
+_DESCRIPTORS_LOCK = Lock()
+
+
+def _compile_map(game_map: Map) -> MapDescriptor:
+    powers = tuple(sorted(game_map.powers))
+    locs = tuple(loc.upper() for loc in game_map.locs)
+    army_moves = {}
+    for loc in game_map.locs:
+        candidates = set()
+        for place in game_map.abut_list(loc):
+            candidates.add(place.upper())
+            candidates.add(place.upper()[:3])
+        army_moves[loc.upper()] = tuple(
+            sorted(other for other in candidates if game_map.abuts("A", loc, "-", other))
+        )
+    return MapDescriptor(
+        name=game_map.name,
+        powers=powers,
+        power_index={power: i for i, power in enumerate(powers)},
+        locs=locs,
+        loc_index={loc: i for i, loc in enumerate(locs)},
+        army_moves=army_moves,
+        home_centers={power: tuple(game_map.homes.get(power, ())) for power in powers},
+    )
+
+
+def get_map_descriptor(game_map: Map) -> MapDescriptor:
+    """
+    Get the compiled tables of a map
+        game_map: the map of the game
+    The descriptor is compiled the first time a map is seen, or again once it was evicted,
+    and must not be modified.
+    """
+    with _DESCRIPTORS_LOCK:
+        descriptor = _DESCRIPTORS.get(game_map.name)
+        if descriptor is not None:
+            _DESCRIPTORS.move_to_end(game_map.name)
+            return descriptor
+    descriptor = _compile_map(game_map)
+    with _DESCRIPTORS_LOCK:
+        # another thread may have compiled the same map meanwhile, keep a single descriptor
+        descriptor = _DESCRIPTORS.setdefault(game_map.name, descriptor)
+        _DESCRIPTORS.move_to_end(game_map.name)
+        while len(_DESCRIPTORS) > MAP_CACHE_SIZE:
+            _DESCRIPTORS.popitem(last=False)
+    return descriptor
+
+
+def get_army_moves(game_map: Map) -> Dict[str, Tuple[str, ...]]:
+    """
+    Get the adjacency table of army moves on a map
+        game_map: the map of the game
+    Returns a dict from each location to the locations an army there can move to,
+    such that `loc in table[army]` exactly when `game_map.abuts("A", army, "-", loc)`.
+    The table is part of the map descriptor and must not be modified.
+    """
+    return get_map_descriptor(game_map).army_moves
@@ -0,0 +1,110 @@
+"""
+    Array-backed stance matrices
+
+    Stances and action features are held as N x N float arrays indexed by the
+    sorted nations, with nested-dict views for code expecting stance[n][k].
+    Requires numpy, an optional dependency: pip install stance_vector[numpy]
+
+"""
+
+from typing import Dict, Iterator, List, Mapping, MutableMapping, Sequence
+
+import numpy as np
+
+
+class RowView(MutableMapping[str, float]):
+    """Dict view of one row of a stance matrix, writes go to the matrix."""
+
+    def __init__(self, row: np.ndarray, index: Dict[str, int]) -> None:
+        self.row = row
+        self.index = index
+
+    def __getitem__(self, nation: str) -> float:
+        return float(self.row[self.index[nation]])
+
+    def __setitem__(self, nation: str, value: float) -> None:
+        self.row[self.index[nation]] = value
+
+    def __delitem__(self, nation: str) -> None:
+        raise TypeError("nations cannot be removed from a stance matrix")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class MatrixView(Mapping[str, RowView]):
+    """Nested-dict view of a stance matrix, such that view[n][k] is matrix[i(n), i(k)]."""
+
+    def __init__(self, matrix: np.ndarray, nations: Sequence[str]) -> None:
+        self.matrix = matrix
+        self.nations = list(nations)
+        self.index = {n: i for i, n in enumerate(self.nations)}
+
+    @classmethod
+    def zeros(cls, nations: Sequence[str]) -> "MatrixView":
+        """View of a new N x N matrix of zeros."""
+        return cls(np.zeros((len(nations), len(nations))), nations)
+
+    def __getitem__(self, nation: str) -> RowView:
+        return RowView(self.matrix[self.index[nation]], self.index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.nations)
+
+    def __len__(self) -> int:
+        return len(self.nations)
+
+    def __repr__(self) -> str:
+        return repr(to_dict(self.matrix, self.nations))
+
+
+def to_matrix(table: Mapping[str, Mapping[str, float]], nations: Sequence[str]) -> np.ndarray:
+    """Convert a bi-level dictionary table[n][k] to an N x N float array."""
+    return np.array([[table[n][k] for k in nations] for n in nations], dtype=np.float64)
+
+
+def as_matrix(table: Mapping[str, Mapping[str, float]], nations: Sequence[str]) -> np.ndarray:
+    """Get the matrix behind a MatrixView, or convert another bi-level dictionary."""
+    if isinstance(table, MatrixView) and table.nations == list(nations):
+        return table.matrix
+    return to_matrix(table, nations)
+
+
+def to_dict(matrix: np.ndarray, nations: Sequence[str]) -> Dict[str, Dict[str, float]]:
+    """Convert an N x N array to a bi-level dictionary table[n][k]."""
+    rows = matrix.tolist()
+    return {n: dict(zip(nations, row)) for n, row in zip(nations, rows)}
+
+
+def decay_and_accumulate(
+    stance: np.ndarray,
+    discount: float,
+    hostility: np.ndarray,
+    hostility_s: np.ndarray,
+    friendship: np.ndarray,
+    friendship_ur: np.ndarray,
+) -> np.ndarray:
+    """
+    Decay the stances and accumulate the action features of a phase,
+    with the same operation order as the dict-based update.
+    """
+    updated: np.ndarray = discount * stance - hostility - hostility_s + friendship + friendship_ur
+    return updated
+
+
+def flip_end_game(stance: np.ndarray) -> np.ndarray:
+    """Make every positive stance -1 in place, returning the mask of flipped pairs."""
+    flipped = stance > 0
+    stance[flipped] = -1
+    return flipped
+
+
+def betrayal_candidates(stance: np.ndarray) -> List[int]:
+    """Indices of the nations whose stances are all non-negative."""
+    return [int(i) for i in np.flatnonzero(np.all(stance >= 0, axis=1))]
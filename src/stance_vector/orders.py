@@ -0,0 +1,116 @@
+"""
+    Parsed order tables
+
+    The orders of a phase are parsed once into typed records grouped by power,
+    and the resulting table is shared by every stance model reading the same phase.
+
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+# Number of phases whose parsed orders are kept in the process-wide cache
+ORDER_TABLE_CACHE_SIZE = 1024
+
+
+class ParsedOrder(NamedTuple):
+    """
+    A single parsed order of a phase
+        kind: HOLD, MOVE, SUPPORT, CONVOY or UNKNOWN
+        unit_type: "A" or "F", empty for unknown orders
+        unit: location of the ordered unit
+        source: location of the supported/convoyed unit, or of the ordered unit itself
+        target: destination of the move/support/convoy, None for (supports to) holds
+    """
+
+    kind: str
+    unit_type: str
+    unit: str
+    source: str
+    target: Optional[str]
+
+
+class OrderTable(Dict[str, Tuple[ParsedOrder, ...]]):
+    """
+    Parsed orders of a phase grouped by power, with indexes over its moves
+        moves: "unit-target" -> (target, powers ordering that move)
+        moves_to: target -> powers moving a unit there
+    """
+
+    moves: Dict[str, Tuple[str, Tuple[str, ...]]]
+    moves_to: Dict[str, Tuple[str, ...]]
+
+    def __init__(self, orders: Dict[str, Tuple[ParsedOrder, ...]]) -> None:
+        super().__init__(orders)
+        moves: Dict[str, Tuple[str, List[str]]] = {}
+        moves_to: Dict[str, List[str]] = {}
+        for power, power_orders in orders.items():
+            for order in power_orders:
+                if order.kind == "MOVE" and order.target is not None:
+                    movers = moves.setdefault(f"{order.unit}-{order.target}", (order.target, []))[1]
+                    if power not in movers:
+                        movers.append(power)
+                    targeting = moves_to.setdefault(order.target, [])
+                    if power not in targeting:
+                        targeting.append(power)
+        self.moves = {move: (target, tuple(movers)) for move, (target, movers) in moves.items()}
+        self.moves_to = {target: tuple(powers) for target, powers in moves_to.items()}
+
+
+def parse_order(order: str) -> Tuple[str, ...]:
+    """
+    Dipnet order syntax based on
+    https://docs.google.com/document/d/16RODa6KDX7vNNooBdciI4NqSVN31lToto3MLTNcEHk0/edit
+
+    The parser will return a tuple:
+    (order_type, unit_location, source_location, *target_location)
+    """
+    order_comp = order.split()
+    if len(order_comp) == 3:
+        if order_comp[2] == "H":
+            return "HOLD", order_comp[1], order_comp[1]
+    elif len(order_comp) == 4:
+        if order_comp[2] in {"-", "R"}:
+            return "MOVE", order_comp[1], order_comp[1], order_comp[3]
+    elif len(order_comp) == 5:
+        if order_comp[2] == "-":
+            return "MOVE", order_comp[1], order_comp[1], order_comp[3]
+        elif order_comp[2] == "S":
+            return "SUPPORT", order_comp[1], order_comp[4]
+    elif len(order_comp) == 7:
+        if order_comp[2] == "S":
+            return "SUPPORT", order_comp[1], order_comp[4], order_comp[6]
+        elif order_comp[2] == "C":
+            return "CONVOY", order_comp[1], order_comp[4], order_comp[6]
+    return "UNKNOWN", "UNKNOWN", "UNKNOWN"
+
+
+def parse_order_record(order: str) -> ParsedOrder:
+    """Parse an order into a typed record."""
+    parsed = parse_order(order)
+    unit_type = order.split(maxsplit=1)[0] if parsed[0] != "UNKNOWN" else ""
+    target = parsed[3] if len(parsed) > 3 else None
+    return ParsedOrder(parsed[0], unit_type, parsed[1], parsed[2], target)
+
+
+@lru_cache(maxsize=ORDER_TABLE_CACHE_SIZE)
+def _build_order_table(phase_orders: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> OrderTable:
+    return OrderTable(
+        {
+            power: tuple(parse_order_record(order) for order in orders)
+            for power, orders in phase_orders
+        }
+    )
+
+
+def get_order_table(orders: Mapping[str, Optional[Iterable[str]]]) -> OrderTable:
+    """
+    Get the parsed orders of a phase grouped by power.
+        orders: the orders of each power in the phase, None for unset orders
+    The table is built the first time a phase is seen and shared afterwards,
+    so it must not be modified.
+    """
+    phase_orders = tuple(
+        (power, tuple(power_orders or ())) for power, power_orders in orders.items()
+    )
+    return _build_order_table(phase_orders)
@@ -0,0 +1,103 @@
+"""
+    Parallel feature extraction
+
+    The features of a movement phase only depend on that phase, only folding them
+    into the stances, with the decay and the betrayal heuristics, is sequential.
+    For long games, the features of the phases are extracted by worker processes
+    in batches, and yielded in order for ActionBasedStance.stance_trajectory to fold in,
+    so that the stances and random betrayals are the same as in a serial pass.
+
+"""
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from diplomacy import Game
+
+from .stance_extraction import PhaseSnapshot
+
+if TYPE_CHECKING:
+    from .action_based_stance import ActionBasedStance, PhaseFeatures
+
+# Number of phases sent to a worker at once
+BATCH_SIZE = 16
+
+# Phase sent to a worker, a snapshot without its map
+_Phase = Tuple[str, Dict[str, Dict[str, Any]], Dict[str, List[str]]]
+
+# Model extracting the features in a worker process
+_WORKER_MODEL: Optional["ActionBasedStance"] = None
+
+
+def _init_worker(map_name: str, identity: str, options: Dict[str, Any]) -> None:
+    from .action_based_stance import ActionBasedStance
+
+    global _WORKER_MODEL
+    _WORKER_MODEL = ActionBasedStance(identity, Game(map_name=map_name), **options)
+
+
+def _extract_features(phases: List[_Phase]) -> List["PhaseFeatures"]:
+    """Extract the features of a batch of phases in a worker process."""
+    model = _WORKER_MODEL
+    assert model is not None
+    features = []
+    for name, state, orders in phases:
+        m_phase_data = PhaseSnapshot(name, state, orders, model.game.map)
+        model.territories = model.extract_terr(m_phase_data)
+        features.append(model.extract_features(m_phase_data))
+    return features
+
+
+def iter_phase_features(
+    model: "ActionBasedStance", snapshots: Iterable[PhaseSnapshot], workers: int
+) -> Iterator[Tuple[PhaseSnapshot, "PhaseFeatures"]]:
+    """
+    Extract the features of movement phases in worker processes
+        model: the model whose coefficients and options the features are extracted with
+        snapshots: the movement phases, only read a few batches ahead of the features yielded
+        workers: number of worker processes
+    Yields each snapshot along with its features, in order
+    """
+    options = {
+        "invasion_coef": model.alpha1,
+        "conflict_coef": model.alpha2,
+        "invasive_support_coef": model.beta1,
+        "conflict_support_coef": model.beta2,
+        "friendly_coef": model.gamma1,
+        "unrealized_coef": model.gamma2,
+        "random_betrayal": model.random_betrayal,
+        "ego_only": model.ego_only,
+        "ego_column": model.ego_column,
+    }
+    initargs = (model.map_descriptor.name, model.identity, options)
+    pending: Deque[Tuple[List[PhaseSnapshot], "Future[List[PhaseFeatures]]"]] = deque()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as executor:
+
+        def submit(batch: List[PhaseSnapshot]) -> None:
+            phases = [
+                (m_phase_data.name, m_phase_data.state, m_phase_data.orders)
+                for m_phase_data in batch
+            ]
+            pending.append((batch, executor.submit(_extract_features, phases)))
+
+        batch: List[PhaseSnapshot] = []
+        for m_phase_data in snapshots:
+            batch.append(m_phase_data)
+            if len(batch) == BATCH_SIZE:
+                submit(batch)
+                batch = []
+            # keep every worker busy without reading the whole game ahead
+            while len(pending) > 2 * workers:
+                yield from _results(pending.popleft())
+        if batch:
+            submit(batch)
+        while pending:
+            yield from _results(pending.popleft())
+
+
+def _results(
+    batch: Tuple[List[PhaseSnapshot], "Future[List[PhaseFeatures]]"]
+) -> Iterator[Tuple[PhaseSnapshot, "PhaseFeatures"]]:
+    snapshots, future = batch
+    yield from zip(snapshots, future.result())
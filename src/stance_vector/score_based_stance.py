@@ -1,9 +1,12 @@
-from itertools import product
-from typing import Dict
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
 
 from diplomacy import Game
 
 from .stance_extraction import StanceExtraction
+from .state import StateReader, StateWriter
+
+if TYPE_CHECKING:
+    from .game_log import GameLog
 
 
 class ScoreBasedStance(StanceExtraction):
@@ -16,31 +19,98 @@ class ScoreBasedStance(StanceExtraction):
 
     scores: Dict[str, int]
 
-    def __init__(self, my_identity: str, game: Game) -> None:
+    def __init__(self, my_identity: str, game: Union[Game, "GameLog"]) -> None:
         super().__init__(my_identity, game)
         self.scores = {n: 0 for n in self.nations}
         self.stance = {n: {k: 0 for k in self.nations} for n in self.nations}
 
-    def extract_scores(self) -> Dict[str, int]:
+    def extract_scores(self, centers: Optional[Dict[str, List[str]]] = None) -> Dict[str, int]:
         """Extract scores at the end of each round.
 
         A nation's score is the number of centers it controls.
+            centers: the centers of each nation, the current ones of the game by default
 
         Returns a dict of scores for all nations
         """
-        return {n: len(self.game.get_centers(n)) for n in self.nations}
+        if centers is None:
+            return {n: len(self.game.get_centers(n)) for n in self.nations}
+        return {n: len(centers[n]) for n in self.nations}
 
     def get_stance(self) -> Dict[str, Dict[str, float]]:  # type: ignore[override]
         """Extract turn-level subjective stance of nation n on nation k.
 
+        Only the stances of nations whose score changed since the last call are recomputed.
+
         Returns a bi-level dictionary of stance score stance[n][k]
         """
-        self.scores = self.extract_scores()
+        with self._instrumented_call("get_stance", self.game.current_short_phase):
+            with self._stage("extract_scores"):
+                scores = self.extract_scores()
+            with self._stage("update"):
+                return self.update_scores(scores)
+
+    def stance_trajectory(
+        self, game: Union[Game, "GameLog"], all_phases: bool = False
+    ) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Extract the stances at every movement phase of a game in one pass over its history.
+
+        The stance of a phase is what get_stance returns while the game is in that phase.
+        The game can also be a saved game log read with stance_vector.game_log.GameLog.
+            all_phases: whether to include the retreat and adjustment phases
+                        and the current phase of the game
+
+        Returns a dictionary from phase names to copies of stance[n][k]
+        """
+        if isinstance(game, Game):
+            self.game = game
+        trajectory = {}
+        for phase_name, centers in self._iter_centers(game, all_phases):
+            stance = self.update_scores(self.extract_scores(centers))
+            trajectory[phase_name] = {n: dict(stance[n]) for n in self.nations}
+        return trajectory
+
+    def _iter_centers(
+        self, game: Union[Game, "GameLog"], all_phases: bool
+    ) -> Iterator[Tuple[str, Dict[str, List[str]]]]:
+        """Walk the phases of a game once, yielding the centers at the start of each phase."""
+        if not all_phases:
+            for m_phase_data in self.iter_m_snapshots(game):
+                yield m_phase_data.name, m_phase_data.state["centers"]
+        elif isinstance(game, Game):
+            for phase_name, state in game.state_history.items():
+                yield str(phase_name), state["centers"]
+            yield game.current_short_phase, game.get_centers()
+        else:
+            for phase in game.iter_phases():
+                yield phase["name"], phase["state"]["centers"]
 
-        for n, k in product(self.nations, repeat=2):
-            if self.scores[n] > 0 and self.scores[n] > self.scores[k]:
+    def _save_state(self, writer: StateWriter) -> None:
+        """Write the scores of the nations."""
+        writer.pack(f"{len(self.nations)}q", *(self.scores[n] for n in self.nations))
+
+    def _load_state(self, reader: StateReader, stance: Dict[str, Dict[str, float]]) -> None:
+        """Restore the scores written by _save_state."""
+        self.scores = dict(zip(self.nations, reader.unpack(f"{len(self.nations)}q")))
+        self.stance = stance
+
+    def update_scores(self, scores: Dict[str, int]) -> Dict[str, Dict[str, float]]:
+        """Update the stances to new scores, as get_stance does with those of the game.
+
+        Only the rows and columns of the nations whose score changed are recomputed.
+            scores: the scores of the nations, see extract_scores
+
+        Returns a bi-level dictionary of stance score stance[n][k]
+        """
+        changed = [n for n in self.nations if scores[n] != self.scores[n]]
+        self.scores = scores
+        if not changed:
+            return self.stance
+        pairs = {(n, k) for n in changed for k in self.nations}
+        pairs.update((n, k) for n in self.nations for k in changed)
+        for n, k in pairs:
+            if scores[n] > 0 and scores[n] > scores[k]:
                 self.stance[n][k] = 1
-            elif self.scores[n] > 0 and self.scores[n] < self.scores[k]:
+            elif scores[n] > 0 and scores[n] < scores[k]:
                 self.stance[n][k] = -1
             else:
                 self.stance[n][k] = 0
@@ -0,0 +1,241 @@
+"""
+    Shared stance service
+
+    Bots of several powers in one process would each compute the same stance matrix
+    with their own ActionBasedStance. A StanceService computes it once per movement phase,
+    without random betrayals, and hands out a PowerStance per power.
+    What makes the stances of a power differ, its update_stance overrides and
+    the random betrayals of its own generator, is kept as a sparse overlay on the shared matrix,
+    such that a PowerStance gives the same stances as an ActionBasedStance of that power
+    in incremental mode, created at the same point of the game with the same random seed.
+    As such a model folds in the whole history on its first call, a view created mid-game
+    replays the shared updates from the start, drawing its betrayals over the history,
+    so the service keeps the updates of every movement phase.
+
+"""
+
+import random
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Set
+
+from diplomacy import Game
+
+from .action_based_stance import ActionBasedStance, PhaseFeatures
+
+
+class SharedUpdate(NamedTuple):
+    """
+    A movement phase folded into the shared stances
+        name: the name of the movement phase
+        features: the action features of the phase
+        stance: the shared stances after the phase
+        betrayable: the nations whose shared stances are all non-negative after the phase
+    """
+
+    name: str
+    features: PhaseFeatures
+    stance: Mapping[str, Mapping[str, float]]
+    betrayable: Set[str]
+
+
+class OverlayRow(Mapping[str, float]):
+    """Read-only row of the stances of a power, the shared row where it is not overlaid."""
+
+    def __init__(self, row: Mapping[str, float], overlay: Mapping[str, float]) -> None:
+        self.row = row
+        self.overlay = overlay
+
+    def __getitem__(self, nation: str) -> float:
+        if nation in self.overlay:
+            return self.overlay[nation]
+        return self.row[nation]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.row)
+
+    def __len__(self) -> int:
+        return len(self.row)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class OverlayStance(Mapping[str, OverlayRow]):
+    """Read-only stances stance[n][k] of a power, the shared stances with its overlay."""
+
+    def __init__(
+        self,
+        stance: Mapping[str, Mapping[str, float]],
+        overlay: Mapping[str, Mapping[str, float]],
+    ) -> None:
+        self.stance = stance
+        self.overlay = overlay
+
+    def __getitem__(self, nation: str) -> OverlayRow:
+        return OverlayRow(self.stance[nation], self.overlay.get(nation, {}))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.stance)
+
+    def __len__(self) -> int:
+        return len(self.stance)
+
+    def __repr__(self) -> str:
+        return repr({n: dict(row) for n, row in self.items()})
+
+
+class StanceService:
+    """
+    Stances of a game computed once per movement phase and shared by the powers of a process.
+        game: the game
+        random_betrayal: whether the powers randomly betray a nation they have no enemy of,
+                         each drawing from its own generator
+        **stance_options: the other options of ActionBasedStance, except the incremental,
+                          random and ego-only ones
+    """
+
+    model: ActionBasedStance
+    random_betrayal: bool
+    views: List["PowerStance"]
+    _initial: Dict[str, Dict[str, float]]
+    _updates: List[SharedUpdate]
+
+    def __init__(self, game: Game, random_betrayal: bool = True, **stance_options: Any) -> None:
+        for option in ["incremental", "random_seed", "ego_only", "ego_column"]:
+            if option in stance_options:
+                raise ValueError(f"The {option} option is not supported by the stance service")
+        identity = sorted(game.powers)[0]
+        self.model = ActionBasedStance(
+            identity, game, random_betrayal=False, incremental=True, **stance_options
+        )
+        self.random_betrayal = random_betrayal
+        self.views = []
+        # the stances before the first update, where every view starts
+        self._initial = {n: dict(row) for n, row in self.model.stance.items()}
+        # every update since the start of the game, replayed by the views created later
+        self._updates = []
+
+    @property
+    def nations(self) -> List[str]:
+        return self.model.nations
+
+    def view(self, power: str, random_seed: Optional[int] = None) -> "PowerStance":
+        """
+        Get the stances of a power, which replays every shared update on its first call
+            power: the power
+            random_seed: the seed of its random betrayals
+        """
+        view = PowerStance(self, power, random_seed)
+        self.views.append(view)
+        return view
+
+    def advance(self, game: Game) -> None:
+        """Fold in the movement phases of a game processed since the last call, once."""
+        model = self.model
+        for update in model.apply_new_m_phases(model.read_new_m_phases(game)):
+            stance = update.stance
+            betrayable = {n for n in self.nations if all(v >= 0 for v in stance[n].values())}
+            self._updates.append(SharedUpdate(update.name, update.features, stance, betrayable))
+
+
+class PowerStance:
+    """
+    Stances of a power, handed out by StanceService.view
+        identity: the power
+        random: the generator of its random betrayals
+        position: the number of shared updates applied
+        overlay: overlay[n][k] is the stance of n on k where it differs from the shared one
+    """
+
+    service: StanceService
+    identity: str
+    random: random.Random
+    position: int
+    overlay: Dict[str, Dict[str, float]]
+    _shared: Mapping[str, Mapping[str, float]]
+
+    def __init__(self, service: StanceService, identity: str, random_seed: Optional[int]) -> None:
+        self.service = service
+        self.identity = identity
+        self.random = random.Random(random_seed)
+        self.position = 0
+        self.overlay = {}
+        self._shared = service._initial
+
+    @property
+    def stance(self) -> OverlayStance:
+        return OverlayStance(self._shared, self.overlay)
+
+    def get_stance(self, game: Game, message: Any = None) -> OverlayStance:
+        """
+        Extract the stances of nation n on nation k, folding in the movement phases
+        processed since the last call, as ActionBasedStance.get_stance does in incremental mode.
+            game: the game
+            message: not used
+        Returns a read-only bi-level mapping of stance score stance[n][k],
+        which is not changed by later calls
+        """
+        service = self.service
+        service.advance(game)
+        for update in service._updates[self.position :]:
+            self._apply(update)
+            self.position += 1
+        return self.stance
+
+    def update_stance(self, my_id: str, opp_id: str, value: float) -> None:
+        """
+        Force update the stance value of this power only
+        could be used when receiving ally proposal
+        """
+        row = dict(self.overlay.get(my_id, {}))
+        row[opp_id] = value
+        self.overlay = {**self.overlay, my_id: row}
+
+    def _apply(self, update: SharedUpdate) -> None:
+        """
+        Update the overlaid stances as ActionBasedStance would, apply the random betrayals,
+        then drop the stances that became equal to the shared ones.
+        """
+        model = self.service.model
+        nations = self.service.nations
+        hostility_to = update.features.hostility_to
+        hostility_s_to = update.features.hostility_s_to
+        friendship_to = update.features.friendship_to
+        friendship_ur_to = update.features.friendship_ur_to
+        end_game = model.end_game_flip and int(update.name[1:5]) > model.year_threshold
+
+        overlay: Dict[str, Dict[str, float]] = {}
+        for n, row in self.overlay.items():
+            overlay[n] = {}
+            for k, value in row.items():
+                value = (
+                    model.discount * value
+                    - hostility_to[n][k]
+                    - hostility_s_to[n][k]
+                    + friendship_to[n][k]
+                    + friendship_ur_to[n][k]
+                )
+                # simple heuristic to make all other countries enemies
+                if end_game and value > 0:
+                    value = -1
+                overlay[n][k] = value
+
+        # randomly chose one enemy if stance are all positive
+        if self.service.random_betrayal:
+            for n in nations:
+                if n in overlay:
+                    shared_row = update.stance[n]
+                    row = overlay[n]
+                    betrayable = all(row.get(k, shared_row[k]) >= 0 for k in nations)
+                else:
+                    betrayable = n in update.betrayable
+                if betrayable:
+                    flip_k = self.random.choice([k for k in nations if k != n])
+                    overlay.setdefault(n, {})[flip_k] = -1
+
+        self.overlay = {}
+        for n, row in overlay.items():
+            shared_row = update.stance[n]
+            row = {k: value for k, value in row.items() if value != shared_row[k]}
+            if row:
+                self.overlay[n] = row
+        self._shared = update.stance
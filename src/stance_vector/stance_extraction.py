@@ -1,35 +1,115 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 from diplomacy import Game, GamePhaseData
+from diplomacy.engine.map import Map
+
+from .instrumentation import NULL_STAGE, Instrumentation
+from .maps import MapDescriptor, get_map_descriptor
+from .state import StateReader, StateWriter, read_header, write_header
+
+if TYPE_CHECKING:
+    from .game_log import GameLog
+
+
+class PhaseSnapshot(NamedTuple):
+    """
+    Read-only view of a movement phase, holding only what the stance models read:
+    the units, retreats and centers at the start of the phase, the orders given
+    during the phase and the map of the game.
+    Nothing is copied, so a snapshot must not be modified.
+    """
+
+    name: str
+    state: Dict[str, Dict[str, Any]]
+    orders: Dict[str, List[str]]
+    map: Map
+
+
+def _history_snapshot(game: Game, phase_name: Any) -> PhaseSnapshot:
+    """Snapshot a phase from the game history, given its history key."""
+    state = game.state_history[phase_name]
+    return PhaseSnapshot(
+        name=str(phase_name),
+        state={
+            "units": state["units"],
+            "retreats": state["retreats"],
+            "centers": state["centers"],
+        },
+        orders=game.order_history.get(phase_name, {}),
+        map=game.map,
+    )
+
+
+class Territories(Dict[str, List[str]]):
+    """
+    Sorted territories of each nation, indexed by location,
+    so that finding whose territory a location is takes O(1).
+        owners: location -> nations holding it as territory
+    The index is built on construction, so the territories must not be modified afterwards.
+    """
+
+    owners: Dict[str, Tuple[str, ...]]
+
+    def __init__(self, territories: Dict[str, List[str]]) -> None:
+        super().__init__(territories)
+        owners: Dict[str, List[str]] = {}
+        for nation, locs in territories.items():
+            for loc in locs:
+                owners.setdefault(loc, []).append(nation)
+        self.owners = {loc: tuple(nations) for loc, nations in owners.items()}
 
 
 class StanceExtraction(ABC):
     """Abstract Base Class for stance vector extraction."""
 
     identity: str
+    map_descriptor: MapDescriptor
     nations: List[str]
     current_round: int
-    territories: Dict[str, List[str]]
+    territories: Territories
     stance: Dict[str, Dict[str, float]]
     game: Game
+    instrumentation: Optional[Instrumentation]
+    _cached_game: Optional[Game]
+    _cached_phase_key: Optional[Tuple[str, int]]
+    _cached_phase: Dict[str, Any]
 
-    def __init__(self, my_identity: str, game: Game) -> None:
+    def __init__(self, my_identity: str, game: Union[Game, "GameLog"]) -> None:
+        """
+        Initialize the stances of the nations of a game
+            my_identity: the nation whose stances are of interest
+            game: the game, or a saved game log read with stance_vector.game_log.GameLog,
+                  in which case only stance_trajectory can be computed until a game is given
+        """
         self.identity = my_identity
-        self.nations = sorted(game.get_map_power_names())
+        # tables of the map, compiled once per process
+        self.map_descriptor = get_map_descriptor(game.map)
+        self.nations = list(self.map_descriptor.powers)
         self.current_round = 0
-        self.territories = {n: [] for n in self.nations}
+        self.territories = Territories({n: [] for n in self.nations})
         self.stance = {n: {k: 0.1 for k in self.nations} for n in self.nations}
-        self.game = game
+        if isinstance(game, Game):
+            self.game = game
+        # stage timings of get_stance, see stance_vector.instrumentation
+        self.instrumentation = None
+        self._cached_game = None
+        self._cached_phase_key = None
+        self._cached_phase = {}
 
-    def extract_terr(self) -> Dict[str, List[str]]:
-        """Extract current territories for each nation from the turn-level JSON log of a game."""
+    def extract_terr(self, m_phase_data: Optional[PhaseSnapshot] = None) -> Territories:
+        """
+        Extract current territories for each nation from the turn-level JSON log of a game,
+        along with the index of the nations holding each location.
+            m_phase_data: the movement phase to read, the previous one by default
+        """
 
         def unit2loc(units: str) -> List[str]:
             return [unit[2:5] for unit in units]
 
         # Obtain orderable location from the previous state
-        m_phase_data = self.get_prev_m_phase()
+        if m_phase_data is None:
+            m_phase_data = self.get_prev_m_snapshot()
         terr = {}
         for nation in self.nations:
             locs = (
@@ -38,23 +118,153 @@ class StanceExtraction(ABC):
                 + m_phase_data.state["centers"][nation]
             )
             terr[nation] = sorted(set(locs))
-        return terr
+        return Territories(terr)
+
+    def _instrumented_call(self, name: str, phase: str) -> Any:
+        """Context manager recording a call, a no-op unless an instrumentation is attached."""
+        if self.instrumentation is None:
+            return NULL_STAGE
+        return self.instrumentation.call(name, phase)
+
+    def _stage(self, name: str) -> Any:
+        """Context manager timing a stage of the current call, a no-op unless instrumented."""
+        if self.instrumentation is None:
+            return NULL_STAGE
+        return self.instrumentation.stage(name)
+
+    def _phase_cache(self) -> Dict[str, Any]:
+        """
+        Memo for data derived from the current phase of the game.
+        It is emptied whenever the game is replaced or advances to another phase.
+        """
+        game = self.game
+        key = (game.current_short_phase, len(game.state_history))
+        if self._cached_game is not game or self._cached_phase_key != key:
+            self._cached_game = game
+            self._cached_phase_key = key
+            self._cached_phase = {}
+        return self._cached_phase
+
+    def _prev_m_phase_key(self) -> Optional[Any]:
+        """Find the history key of the latest processed movement phase, if any."""
+        for phase_name, _ in self.game.state_history.reversed_items():
+            if str(phase_name).endswith("M"):
+                return phase_name
+        return None
 
     def get_prev_m_phase(self) -> GamePhaseData:
-        phase_hist = self.game.get_phase_history()
-        prev_m_phase_name = None
-        for phase_data in reversed(phase_hist):
-            if phase_data.name.endswith("M"):
-                prev_m_phase_name = phase_data.name
-                break
+        """Get the data of the previous movement phase, memoized until the game advances."""
+        cache = self._phase_cache()
+        if "m_phase" in cache:
+            cached_phase: GamePhaseData = cache["m_phase"]
+            return cached_phase
+        prev_m_phase_name = self._prev_m_phase_key()
         if prev_m_phase_name:
-            prev_m_phase = self.game.get_phase_from_history(prev_m_phase_name, self.game.role)
+            prev_m_phase = self.game.get_phase_from_history(str(prev_m_phase_name), self.game.role)
         else:
-            prev_m_phase = self.game.get_phase_data()
-            # Remove private messages between other powers
-            prev_m_phase.messages = self.game.filter_messages(prev_m_phase.messages, self.game.role)
+            # No stance model reads messages, so they are not copied
+            game = self.game
+            prev_m_phase = GamePhaseData(
+                name=game.current_short_phase,
+                state=game.get_state(),
+                orders={
+                    power.name: (game.get_orders(power.name) if power.order_is_set else None)
+                    for power in game.powers.values()
+                },
+                messages={},
+                results={},
+            )
+        cache["m_phase"] = prev_m_phase
         return prev_m_phase
 
+    def get_prev_m_snapshot(self) -> PhaseSnapshot:
+        """
+        Capture the previous movement phase as a snapshot,
+        reading the game history in place instead of copying the game.
+        Falls back to the current phase if no movement phase was processed yet.
+        """
+        cache = self._phase_cache()
+        if "m_snapshot" in cache:
+            cached_snapshot: PhaseSnapshot = cache["m_snapshot"]
+            return cached_snapshot
+        game = self.game
+        prev_m_phase_name = self._prev_m_phase_key()
+        if prev_m_phase_name:
+            snapshot = _history_snapshot(game, prev_m_phase_name)
+        else:
+            snapshot = PhaseSnapshot(
+                name=game.current_short_phase,
+                state={
+                    "units": game.get_units(),
+                    "retreats": {
+                        power.name: power.retreats.copy() for power in game.powers.values()
+                    },
+                    "centers": game.get_centers(),
+                },
+                orders={
+                    power.name: game.get_orders(power.name) if power.order_is_set else []
+                    for power in game.powers.values()
+                },
+                map=game.map,
+            )
+        cache["m_snapshot"] = snapshot
+        return snapshot
+
+    def iter_m_snapshots(self, game: Union[Game, "GameLog"]) -> Iterator[PhaseSnapshot]:
+        """
+        Walk the phase history of a game once,
+        yielding a snapshot of each processed movement phase in order.
+            game: the game, or a saved game log whose phases are read as they are reached
+        """
+        if not isinstance(game, Game):
+            yield from game.iter_m_snapshots()
+            return
+        for phase_name in game.state_history.keys():
+            if str(phase_name).endswith("M"):
+                yield _history_snapshot(game, phase_name)
+
+    def _m_snapshots_after(self, game: Game, m_phase_name: Optional[str]) -> List[PhaseSnapshot]:
+        """
+        Snapshot the processed movement phases of a game after a given one, in order,
+        walking its history back from the latest phase, so only the phases after it are read.
+        All of them are snapshotted if the given phase is not in the history.
+        """
+        phase_names = []
+        for phase_name, _ in game.state_history.reversed_items():
+            if str(phase_name) == m_phase_name:
+                break
+            if str(phase_name).endswith("M"):
+                phase_names.append(phase_name)
+        return [_history_snapshot(game, phase_name) for phase_name in reversed(phase_names)]
+
+    def save_state(self) -> bytes:
+        """
+        Snapshot the stances, and what else the model needs to continue, in a compact binary form.
+        The snapshot can be restored with load_state by a model of the same nations and options.
+        """
+        writer = StateWriter()
+        write_header(writer, self.nations)
+        writer.table(self.stance)
+        self._save_state(writer)
+        return writer.getvalue()
+
+    def load_state(self, data: bytes) -> None:
+        """
+        Restore a snapshot taken with save_state,
+        so that this model continues exactly as the one that was saved.
+        """
+        reader = StateReader(data)
+        read_header(reader, self.nations)
+        stance = reader.table(self.stance)
+        self._load_state(reader, stance)
+
+    def _save_state(self, writer: StateWriter) -> None:
+        """Write the model-specific fields of a snapshot."""
+
+    def _load_state(self, reader: StateReader, stance: Dict[str, Dict[str, float]]) -> None:
+        """Read the model-specific fields of a snapshot, and set the restored stances."""
+        self.stance = stance
+
     @abstractmethod
     def get_stance(self, log: Any, messages: Any) -> Dict[str, Dict[str, float]]:
         """
@@ -0,0 +1,117 @@
+"""
+    Binary stance state snapshots
+
+    Layout of a snapshot, little-endian:
+        magic b"SVST", format version (uint16)
+        nations: count (uint16), then each name (uint16 length + UTF-8)
+        stance[n][k] table, see StateWriter.table
+        model-specific fields, see StanceExtraction.save_state
+
+"""
+
+import random
+import struct
+from typing import Any, Dict, List, Mapping, Tuple
+
+STATE_MAGIC = b"SVST"
+STATE_VERSION = 1
+
+# version, 624 words and the position of random.getstate()
+_RNG_STATE = struct.Struct("<B625I")
+
+
+class StateWriter:
+    """Accumulates the fields of a snapshot."""
+
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+
+    def pack(self, fmt: str, *values: Any) -> None:
+        self.chunks.append(struct.pack("<" + fmt, *values))
+
+    def string(self, value: str) -> None:
+        encoded = value.encode("utf-8")
+        self.pack("H", len(encoded))
+        self.chunks.append(encoded)
+
+    def table(self, table: Mapping[str, Mapping[str, float]]) -> None:
+        """
+        Write the values of a bi-level table in iteration order as doubles,
+        followed by a bitmask of the values that are ints, so their type survives.
+        """
+        values = [value for row in table.values() for value in row.values()]
+        is_int = 0
+        for i, value in enumerate(values):
+            if isinstance(value, int):
+                is_int |= 1 << i
+        self.pack("I", len(values))
+        self.pack(f"{len(values)}d", *values)
+        self.chunks.append(is_int.to_bytes((len(values) + 7) // 8, "little"))
+
+    def rng(self, generator: random.Random) -> None:
+        version, internal, gauss_next = generator.getstate()
+        self.chunks.append(_RNG_STATE.pack(version, *internal))
+        self.pack("?d", gauss_next is not None, gauss_next or 0.0)
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.chunks)
+
+
+class StateReader:
+    """Reads back the fields of a snapshot in the order they were written."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, fmt: str) -> Tuple[Any, ...]:
+        values = struct.unpack_from("<" + fmt, self.data, self.offset)
+        self.offset += struct.calcsize("<" + fmt)
+        return values
+
+    def string(self) -> str:
+        (length,) = self.unpack("H")
+        value = self.data[self.offset : self.offset + length].decode("utf-8")
+        self.offset += length
+        return value
+
+    def table(self, template: Mapping[str, Mapping[str, Any]]) -> Dict[str, Dict[str, float]]:
+        """Read a table written by StateWriter.table, with the rows and columns of a template."""
+        (count,) = self.unpack("I")
+        keys = [(n, k) for n, row in template.items() for k in row]
+        if count != len(keys):
+            raise ValueError(f"Snapshot has {count} stances, this model has {len(keys)}")
+        values = self.unpack(f"{count}d")
+        size = (count + 7) // 8
+        is_int = int.from_bytes(self.data[self.offset : self.offset + size], "little")
+        self.offset += size
+        table: Dict[str, Dict[str, float]] = {n: {} for n in template}
+        for i, ((n, k), value) in enumerate(zip(keys, values)):
+            table[n][k] = int(value) if is_int >> i & 1 else value
+        return table
+
+    def rng(self, generator: random.Random) -> None:
+        version, *internal = _RNG_STATE.unpack_from(self.data, self.offset)
+        self.offset += _RNG_STATE.size
+        has_gauss, gauss_next = self.unpack("?d")
+        generator.setstate((version, tuple(internal), gauss_next if has_gauss else None))
+
+
+def write_header(writer: StateWriter, nations: List[str]) -> None:
+    writer.chunks.append(STATE_MAGIC)
+    writer.pack("HH", STATE_VERSION, len(nations))
+    for nation in nations:
+        writer.string(nation)
+
+
+def read_header(reader: StateReader, nations: List[str]) -> None:
+    """Check that a snapshot is of a supported version and of the same nations."""
+    if reader.data[:4] != STATE_MAGIC:
+        raise ValueError("Not a stance state snapshot")
+    reader.offset = 4
+    version, count = reader.unpack("HH")
+    if version != STATE_VERSION:
+        raise ValueError(f"Unsupported stance state version {version}")
+    saved_nations = [reader.string() for _ in range(count)]
+    if saved_nations != nations:
+        raise ValueError(f"Snapshot of nations {saved_nations}, this model has {nations}")
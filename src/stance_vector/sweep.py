@@ -0,0 +1,107 @@
+"""
+    Batched hyperparameter sweeps
+
+    The stance update of ActionBasedStance is linear in its coefficients,
+    apart from the betrayal heuristics. The action counts of a game are extracted once,
+    see stance_vector.features, and every setting of a sweep is then evaluated together
+    as a batch of stance matrices. Requires numpy, an optional dependency:
+    pip install stance_vector[numpy]
+
+"""
+
+import random
+from typing import Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .features import FeatureTensor
+from .matrix import to_dict
+
+
+class SweepSetting(NamedTuple):
+    """Coefficients of ActionBasedStance evaluated in a sweep, with the same defaults."""
+
+    invasion_coef: float = 1.0
+    conflict_coef: float = 0.5
+    invasive_support_coef: float = 1.0
+    conflict_support_coef: float = 0.5
+    friendly_coef: float = 1.0
+    unrealized_coef: float = 1.0
+    discount_factor: float = 0.5
+    year_threshold: int = 1918
+
+
+def sweep(
+    tensor: FeatureTensor,
+    settings: Sequence[SweepSetting],
+    end_game_flip: bool = True,
+    random_betrayal: bool = True,
+    random_seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Evaluate the stance trajectories of a game for many settings at once
+        tensor: the action counts of the game
+        settings: the coefficients to evaluate
+        end_game_flip, random_betrayal, random_seed: as in ActionBasedStance,
+            each setting drawing its random betrayals from its own generator
+    Returns a [settings, phases, N, N] array of the stances after every movement phase,
+    such that stances[s] is what ActionBasedStance.stance_trajectory gives for settings[s],
+    up to the rounding of multiplying counts by coefficients instead of adding them up
+    """
+    nations = tensor.nations
+    counts = tensor.counts
+    n_settings = len(settings)
+    n_nations = len(nations)
+    coefs = np.array(settings, dtype=np.float64).reshape(n_settings, len(SweepSetting._fields))
+
+    def column(field: str) -> np.ndarray:
+        values: np.ndarray = coefs[:, SweepSetting._fields.index(field), None, None]
+        return values
+
+    alpha1, alpha2 = column("invasion_coef"), column("conflict_coef")
+    beta1, beta2 = column("invasive_support_coef"), column("conflict_support_coef")
+    gamma1, gamma2 = column("friendly_coef"), column("unrealized_coef")
+    discount = column("discount_factor")
+    year_threshold = coefs[:, SweepSetting._fields.index("year_threshold")]
+    rngs = [random.Random(random_seed) for _ in range(n_settings)]
+    others = [[k for k in range(n_nations) if k != n] for n in range(n_nations)]
+
+    stance = np.full((n_settings, n_nations, n_nations), 0.1)
+    stances = np.empty((n_settings, len(tensor.phases), n_nations, n_nations))
+    for p, phase_name in enumerate(tensor.phases):
+        hostile_mov, conflict_mov, hostile_sup, conflict_sup, friendly_sup, unrealized = (
+            counts[p, :, :, f] for f in range(counts.shape[-1])
+        )
+        hostility = alpha1 * hostile_mov + alpha2 * conflict_mov
+        hostility_s = beta1 * hostile_sup + beta2 * conflict_sup
+        friendship = gamma1 * friendly_sup
+        friendship_ur = gamma2 * unrealized
+        stance = discount * stance - hostility - hostility_s + friendship + friendship_ur
+
+        # simple heuristic to make all other countries enemies
+        if end_game_flip:
+            late = int(phase_name[1:5]) > year_threshold
+            stance[late[:, None, None] & (stance > 0)] = -1
+
+        # randomly chose one enemy if stance are all positive
+        if random_betrayal:
+            for s, n in zip(*np.nonzero(np.all(stance >= 0, axis=2))):
+                stance[s, n, rngs[s].choice(others[n])] = -1
+
+        stances[:, p] = stance
+    return stances
+
+
+def to_trajectory(
+    stances: np.ndarray, tensor: FeatureTensor
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Convert the stances of one setting of a sweep to the format of stance_trajectory
+        stances: [phases, N, N] array of stances, an entry of what sweep returns
+        tensor: the action counts of the game
+    Returns a dictionary from movement phase names to stance[n][k]
+    """
+    return {
+        phase_name: to_dict(stances[p], tensor.nations)
+        for p, phase_name in enumerate(tensor.phases)
+    }
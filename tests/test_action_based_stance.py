@@ -1,10 +1,48 @@
+import json
+from typing import Any, Dict, List
+
 from diplomacy import Game
+import pytest
 from pytest import approx
 
-from stance_vector import ActionBasedStance
+from stance_vector import ActionBasedStance, stance_extraction
+from stance_vector.stance_extraction import PhaseSnapshot, _history_snapshot
 
 RANDOM_SEED = 0
 
+# Orders of the game played in `test_get_stance_long_game`, until F1902M
+GAME_ORDERS: List[Dict[str, List[str]]] = [
+    {
+        "FRANCE": ["A MAR H", "A PAR H", "F BRE - PIC"],
+        "ENGLAND": ["A LVP - WAL", "F EDI - NTH", "F LON - ENG"],
+        "GERMANY": ["A BER - MUN", "A MUN - BUR", "F KIE - HOL"],
+    },
+    {
+        "FRANCE": ["A MAR - BUR", "A PAR - BRE", "F PIC H"],
+        "ENGLAND": ["A WAL - BEL VIA", "F ENG C A WAL - BEL", "F NTH - HEL"],
+        "GERMANY": ["A BUR - MAR", "A MUN - RUH", "F HOL H"],
+    },
+    {"ENGLAND": ["A LON B"], "GERMANY": ["A MUN B"]},
+    {
+        "FRANCE": ["A BRE H", "A MAR - GAS", "F PIC H"],
+        "ENGLAND": ["A BEL S F PIC", "F ENG S A BRE", "F HEL - HOL"],
+        "GERMANY": ["A BUR - PAR", "A RUH - BUR", "F HOL H"],
+    },
+    {
+        "FRANCE": ["A BRE - PAR", "A GAS - BUR", "F PIC - BEL"],
+        "ENGLAND": ["A BEL - HOL", "F ENG S F PIC - BEL", "F HEL S A BEL - HOL"],
+        "GERMANY": ["A BUR S A PAR - PIC", "A PAR - PIC", "F HOL H"],
+    },
+]
+
+
+def play(game: Game, phase_orders: List[Dict[str, List[str]]]) -> None:
+    """Set the orders of each phase and process it."""
+    for orders in phase_orders:
+        for power, power_orders in orders.items():
+            game.set_orders(power, power_orders)
+        game.process()
+
 
 def test_order_parser() -> None:
     game = Game()
@@ -246,6 +284,81 @@ def test_get_stance_long_game() -> None:
     }
 
 
+def test_extract_features() -> None:
+    game = Game()
+    action_stance = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED)
+    play(game, GAME_ORDERS)
+    action_stance.get_stance(game)
+    features = action_stance.extract_features()
+    assert features.hostile_mov_to["FRANCE"] == ["PAR-PIC"]
+    assert features.hostile_sup_to["FRANCE"] == ["BUR:PAR-PIC"]
+    assert features.friendly_sup_to["FRANCE"] == ["ENG:PIC-BEL", "BUR:PAR-PIC"]
+    assert features.friendship_ur_to["FRANCE"]["ENGLAND"] == 1.0
+    assert features.friendship_ur_to["FRANCE"]["GERMANY"] == 0
+
+    # The extractors are views over the kernel output
+    assert action_stance.extract_hostile_moves("FRANCE") == (
+        features.hostility_to["FRANCE"],
+        ["PAR-PIC"],
+        [],
+    )
+    assert action_stance.extract_hostile_supports("FRANCE", ["PAR-PIC"], []) == (
+        features.hostility_s_to["FRANCE"],
+        ["BUR:PAR-PIC"],
+        [],
+    )
+    assert action_stance.extract_friendly_supports("FRANCE") == (
+        features.friendship_to["FRANCE"],
+        features.friendly_sup_to["FRANCE"],
+    )
+    friendship, unrealized_moves = action_stance.extract_unrealized_hostile_moves("FRANCE")
+    assert friendship == features.friendship_ur_to["FRANCE"]
+    assert "BEL-PIC" in unrealized_moves
+    assert "PAR-PIC" not in unrealized_moves
+
+
+def test_stance_trajectory() -> None:
+    game = Game()
+    action_stance = ActionBasedStance("FRANCE", game, year_threshold=1901, random_seed=RANDOM_SEED)
+    sequential = {}
+    for orders in GAME_ORDERS:
+        phase = game.get_current_phase()
+        play(game, [orders])
+        if phase.endswith("M"):
+            stances = action_stance.get_stance(game)
+            sequential[phase] = {n: dict(stances[n]) for n in stances}
+
+    trajectory_stance = ActionBasedStance(
+        "FRANCE", game, year_threshold=1901, random_seed=RANDOM_SEED
+    )
+    trajectory = trajectory_stance.stance_trajectory(game)
+    assert list(trajectory) == ["S1901M", "F1901M", "S1902M", "F1902M"]
+    assert trajectory == sequential
+    assert trajectory_stance.stance == action_stance.stance
+
+
+def test_get_stance_deepcopy_game() -> None:
+    game = Game()
+    snapshot_stance = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED)
+    deepcopy_stance = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED, deepcopy_game=True)
+
+    game.set_orders("FRANCE", ["A MAR H", "A PAR H", "F BRE - PIC"])
+    game.set_orders("ENGLAND", ["A LVP - WAL", "F EDI - NTH", "F LON - ENG"])
+    game.set_orders("GERMANY", ["A BER - MUN", "A MUN - BUR", "F KIE - HOL"])
+    game.process()
+    assert snapshot_stance.get_stance(game) == deepcopy_stance.get_stance(game)
+
+    game.set_orders("FRANCE", ["A MAR - BUR", "A PAR - BRE", "F PIC H"])
+    game.set_orders("ENGLAND", ["A WAL - BEL VIA", "F ENG C A WAL - BEL", "F NTH - HEL"])
+    game.set_orders("GERMANY", ["A BUR - MAR", "A MUN - RUH", "F HOL H"])
+    game.process()
+    assert snapshot_stance.get_stance(game, verbose=True) == deepcopy_stance.get_stance(
+        game, verbose=True
+    )
+    assert snapshot_stance.game is game
+    assert deepcopy_stance.game is not game
+
+
 def test_update_stance() -> None:
     game = Game()
     my_id = "FRANCE"
@@ -274,3 +387,176 @@ def test_update_stance() -> None:
         "RUSSIA": 0.1,
         "TURKEY": 0.1,
     }
+
+
+def test_get_stance_incremental() -> None:
+    game = Game()
+    incremental_stance = ActionBasedStance(
+        "FRANCE", game, year_threshold=1901, random_seed=RANDOM_SEED, incremental=True
+    )
+    # Nothing to fold in before the first movement phase is processed
+    stances, log = incremental_stance.get_stance(game, verbose=True)
+    assert stances["FRANCE"]["ENGLAND"] == 0.1
+    assert log["FRANCE"]["ENGLAND"] == ""
+
+    play(game, GAME_ORDERS[:1])
+    sequential_stance = ActionBasedStance(
+        "FRANCE", game, year_threshold=1901, random_seed=RANDOM_SEED
+    )
+    expected, expected_log = sequential_stance.get_stance(game, verbose=True)
+    stances, log = incremental_stance.get_stance(game, verbose=True)
+    assert stances == expected and log == expected_log
+    # Repeated calls within a phase do not decay the stances again
+    assert incremental_stance.get_stance(game) is stances
+    assert incremental_stance.get_stance(game, verbose=True) == (expected, expected_log)
+
+    # Skipped movement phases are all folded in
+    play(game, GAME_ORDERS[1:])
+    trajectory = ActionBasedStance(
+        "FRANCE", game, year_threshold=1901, random_seed=RANDOM_SEED
+    ).stance_trajectory(game)
+    assert incremental_stance.get_stance(game) == trajectory["F1902M"]
+    assert incremental_stance.last_m_phase == "F1902M"
+
+
+def test_get_stance_incremental_reads_new_phases(monkeypatch: pytest.MonkeyPatch) -> None:
+    game = Game()
+    incremental_stance = ActionBasedStance("FRANCE", game, incremental=True)
+    play(game, GAME_ORDERS[:4])
+    incremental_stance.get_stance(game)
+    assert incremental_stance.last_m_phase == "S1902M"
+
+    snapshotted = []
+
+    def history_snapshot(game: Game, phase_name: Any) -> PhaseSnapshot:
+        snapshotted.append(str(phase_name))
+        return _history_snapshot(game, phase_name)
+
+    monkeypatch.setattr(stance_extraction, "_history_snapshot", history_snapshot)
+    play(game, GAME_ORDERS[4:])
+    incremental_stance.get_stance(game)
+    # Only the movement phases after the last one consumed are read from the history
+    assert snapshotted == ["F1902M"]
+
+
+def test_read_and_apply_new_m_phases() -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    incremental_stance = ActionBasedStance(
+        "FRANCE", game, random_seed=RANDOM_SEED, incremental=True
+    )
+    new_phases = incremental_stance.read_new_m_phases(game)
+    assert [m_phase_data.name for m_phase_data in new_phases.snapshots] == [
+        "S1901M",
+        "F1901M",
+        "S1902M",
+        "F1902M",
+    ]
+    updates = incremental_stance.apply_new_m_phases(new_phases)
+    trajectory = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED).stance_trajectory(game)
+    assert {update.name: update.stance for update in updates} == trajectory
+    # Nothing is left to fold in
+    assert incremental_stance.read_new_m_phases(game).snapshots == []
+
+    phase_stance = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED)
+    for m_phase_data, update in zip(new_phases.snapshots, updates):
+        assert phase_stance.consume_m_phase(m_phase_data) == update.features
+    assert phase_stance.stance == updates[-1].stance
+
+
+@pytest.mark.parametrize("random_betrayal", [True, False])
+def test_get_stance_ego_only(random_betrayal: bool) -> None:
+    game = Game()
+    kwargs: Dict[str, Any] = dict(
+        year_threshold=1901, random_seed=RANDOM_SEED, random_betrayal=random_betrayal
+    )
+    full_stance = ActionBasedStance("FRANCE", game, **kwargs)
+    ego_stance = ActionBasedStance("FRANCE", game, ego_only=True, **kwargs)
+    column_stance = ActionBasedStance("FRANCE", game, ego_only=True, ego_column=True, **kwargs)
+    for orders in GAME_ORDERS:
+        play(game, [orders])
+        stances, log = full_stance.get_stance(game, verbose=True)
+        ego, ego_log = ego_stance.get_stance(game, verbose=True)
+        column, column_log = column_stance.get_stance(game, verbose=True)
+        assert ego["FRANCE"] == stances["FRANCE"] and ego_log == {"FRANCE": log["FRANCE"]}
+        assert column["FRANCE"] == stances["FRANCE"]
+        for nation in stances:
+            assert column[nation]["FRANCE"] == stances[nation]["FRANCE"]
+            assert column_log[nation]["FRANCE"] == log[nation]["FRANCE"]
+        if not random_betrayal:
+            assert list(ego) == ["FRANCE"]
+
+
+@pytest.mark.parametrize("random_betrayal", [True, False])
+def test_stance_trajectory_ego_only(random_betrayal: bool) -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    kwargs: Dict[str, Any] = dict(
+        year_threshold=1901, random_seed=RANDOM_SEED, random_betrayal=random_betrayal
+    )
+    trajectory = ActionBasedStance("FRANCE", game, **kwargs).stance_trajectory(game)
+    ego_trajectory = ActionBasedStance("FRANCE", game, ego_only=True, **kwargs).stance_trajectory(
+        game
+    )
+    assert list(ego_trajectory) == list(trajectory)
+    for phase_name, stances in trajectory.items():
+        assert ego_trajectory[phase_name]["FRANCE"] == stances["FRANCE"]
+        if not random_betrayal:
+            assert list(ego_trajectory[phase_name]) == ["FRANCE"]
+
+
+def test_ego_only_numpy_engine() -> None:
+    with pytest.raises(ValueError):
+        ActionBasedStance("FRANCE", Game(), ego_only=True, numpy_engine=True)
+
+
+def test_stance_log_records() -> None:
+    game = Game()
+    action_stance = ActionBasedStance("FRANCE", game, year_threshold=1901, random_seed=RANDOM_SEED)
+    play(game, GAME_ORDERS[:1])
+    stances, log = action_stance.get_stance(game, verbose=True)
+
+    record = log.records["FRANCE"]["ENGLAND"]
+    assert record is not None
+    assert record.stance_prev == 0.1 and record.stance == stances["FRANCE"]["ENGLAND"]
+    assert log["FRANCE"]["ENGLAND"] == record.render(1901)
+    assert log.records["FRANCE"]["FRANCE"] is None and log["FRANCE"]["FRANCE"] == ""
+    rendered = log.render()
+    assert rendered == log and all(type(rendered[n][k]) is str for n in log for k in log[n])
+    assert json.loads(json.dumps(record._asdict()))["opponent"] == "ENGLAND"
+    assert action_stance.get_log() is log
+
+
+@pytest.mark.parametrize(
+    "options", [{}, {"numpy_engine": True}, {"ego_only": True, "random_betrayal": False}]
+)
+def test_save_state(options: Dict[str, bool]) -> None:
+    if options.get("numpy_engine"):
+        pytest.importorskip("numpy")
+    game = Game()
+    action_stance = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED, **options)
+    play(game, GAME_ORDERS[:2])
+    action_stance.get_stance(game)
+    state = action_stance.save_state()
+
+    restored_stance = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED + 1, **options)
+    restored_stance.load_state(state)
+    assert restored_stance.stance == action_stance.stance
+    assert restored_stance.last_m_phase == "F1901M"
+    assert restored_stance.save_state() == state
+    for orders in GAME_ORDERS[2:]:
+        play(game, [orders])
+        assert restored_stance.get_stance(game, verbose=True) == action_stance.get_stance(
+            game, verbose=True
+        )
+
+
+def test_load_state_invalid() -> None:
+    action_stance = ActionBasedStance("FRANCE", Game())
+    state = action_stance.save_state()
+    with pytest.raises(ValueError):
+        action_stance.load_state(b"JUNK" + state[4:])
+    with pytest.raises(ValueError):
+        ActionBasedStance("FRANCE", Game(), ego_only=True, random_betrayal=False).load_state(state)
+    with pytest.raises(ValueError):
+        ActionBasedStance("FRANCE", Game(map_name="modern")).load_state(state)
@@ -0,0 +1,102 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+from typing import Any, Callable, TypeVar
+
+from diplomacy import Game
+import pytest
+
+from stance_vector import ActionBasedStance, ScoreBasedStance
+from stance_vector.async_stance import AsyncStance
+from stance_vector.instrumentation import Instrumentation
+
+from .test_action_based_stance import GAME_ORDERS, RANDOM_SEED, play
+
+T = TypeVar("T")
+
+
+class GatedExecutor(ThreadPoolExecutor):
+    """Executor whose calls wait for the gate to open."""
+
+    def __init__(self) -> None:
+        super().__init__(max_workers=1)
+        self.gate = threading.Event()
+
+    def submit(self, __fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        def gated() -> T:
+            self.gate.wait()
+            return __fn(*args, **kwargs)
+
+        return super().submit(gated)
+
+
+@pytest.mark.parametrize("incremental", [True, False])
+def test_get_stance(incremental: bool) -> None:
+    game = Game()
+    model = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED, incremental=incremental)
+    model.instrumentation = Instrumentation()
+    async_stance = AsyncStance(model)
+    expected_stance = ActionBasedStance(
+        "FRANCE", game, random_seed=RANDOM_SEED, incremental=incremental
+    )
+
+    async def main() -> None:
+        for phase_orders in GAME_ORDERS:
+            play(game, [phase_orders])
+            expected, expected_log = expected_stance.get_stance(game, verbose=True)
+            # Concurrent requests share a single computation
+            stance, (verbose_stance, log) = await asyncio.gather(
+                async_stance.get_stance(game), async_stance.get_stance(game, verbose=True)
+            )
+            assert stance == verbose_stance == expected
+            assert log == expected_log
+            assert await async_stance.get_stance(game, verbose=True) == (expected, expected_log)
+
+    asyncio.run(main())
+    assert len(model.instrumentation.records) == len(GAME_ORDERS)
+
+
+def test_get_stance_score_based() -> None:
+    game = Game()
+    async_stance = AsyncStance(ScoreBasedStance("FRANCE", game))
+
+    async def main() -> None:
+        play(game, GAME_ORDERS)
+        stance = await async_stance.get_stance(game)
+        assert stance == ScoreBasedStance("FRANCE", game).get_stance()
+
+    asyncio.run(main())
+
+
+def test_get_stance_cancelled() -> None:
+    game = Game()
+    model = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED, incremental=True)
+    executor = GatedExecutor()
+    async_stance = AsyncStance(model, executor)
+
+    async def main() -> None:
+        play(game, GAME_ORDERS[:1])
+        first = asyncio.ensure_future(async_stance.get_stance(game))
+        while not async_stance._locked():
+            await asyncio.sleep(0)
+
+        # The phase advances while the stances of the previous one are being computed
+        play(game, GAME_ORDERS[1:2])
+        second = asyncio.ensure_future(async_stance.get_stance(game))
+        await asyncio.sleep(0)
+        executor.gate.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        expected = ActionBasedStance(
+            "FRANCE", game, random_seed=RANDOM_SEED, incremental=True
+        ).get_stance(game)
+        assert await second == expected
+
+    with executor:
+        asyncio.run(main())
+
+
+def test_deepcopy_game_not_supported() -> None:
+    game = Game()
+    with pytest.raises(ValueError):
+        AsyncStance(ActionBasedStance("FRANCE", game, deepcopy_game=True))
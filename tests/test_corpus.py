@@ -0,0 +1,139 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+import zipfile
+
+from diplomacy import Game
+from diplomacy.utils.export import to_saved_game_format
+import pytest
+
+from stance_vector import ActionBasedStance, ScoreBasedStance
+from stance_vector.corpus import (
+    GameSource,
+    iter_game_batches,
+    iter_game_sources,
+    main,
+    open_game_log,
+    run_corpus,
+)
+
+from .test_action_based_stance import GAME_ORDERS, RANDOM_SEED, play
+
+
+def write_corpus(corpus: Path) -> List[str]:
+    """Write a .json game and a .jsonl file of two games, returning their keys."""
+    corpus.mkdir()
+    game = Game(game_id="long")
+    play(game, GAME_ORDERS)
+    with open(corpus / "long.json", "w") as file:
+        json.dump(to_saved_game_format(game), file)
+    with open(corpus / "short.jsonl", "w") as file:
+        for game_id in ["short_0", "short_1"]:
+            game = Game(game_id=game_id)
+            play(game, GAME_ORDERS[:1])
+            file.write(json.dumps(to_saved_game_format(game)) + "\n")
+    return [str(corpus / "long.json"), f"{corpus / 'short.jsonl'}:0", f"{corpus / 'short.jsonl'}:1"]
+
+
+def read_output(output: Path) -> List[Dict[str, Any]]:
+    with open(output) as file:
+        return [json.loads(line) for line in file]
+
+
+def test_iter_game_sources(tmp_path: Path) -> None:
+    keys = write_corpus(tmp_path / "corpus")
+    sources = list(iter_game_sources(str(tmp_path / "corpus")))
+    assert [source.key for source in sources] == keys
+    # The lines of a .jsonl file on disk are read at their offset
+    assert [source.offset for source in sources][:2] == [-1, 0]
+    with open_game_log(sources[2]) as file:
+        assert json.load(file)["id"] == "short_1"
+
+    archive = str(tmp_path / "corpus.zip")
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.write(tmp_path / "corpus" / "long.json", "games/long.json")
+        zip_file.write(tmp_path / "corpus" / "short.jsonl", "games/short.jsonl")
+    assert list(iter_game_sources(archive)) == [
+        GameSource(archive, "games/long.json", -1),
+        GameSource(archive, "games/short.jsonl", 0),
+        GameSource(archive, "games/short.jsonl", 1),
+    ]
+
+
+def test_iter_game_batches(tmp_path: Path) -> None:
+    write_corpus(tmp_path / "corpus")
+    archive = str(tmp_path / "corpus.zip")
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.write(tmp_path / "corpus" / "long.json", "games/long.json")
+        zip_file.write(tmp_path / "corpus" / "short.jsonl", "games/short.jsonl")
+    sources = list(iter_game_sources(archive))
+    batches = list(iter_game_batches(sources, size=2))
+    assert [[source for source, _ in batch] for batch in batches] == [sources[:2], sources[2:]]
+    # The lines of a zip member are read in one pass, before the games are sent to the workers
+    assert batches[0][0][1] is None
+    texts = [text for batch in batches for _, text in batch][1:]
+    assert [json.loads(text or "")["id"] for text in texts] == ["short_0", "short_1"]
+
+    output = tmp_path / "stances.jsonl"
+    run_corpus(archive, str(output), workers=2)
+    assert sorted(record["game"] for record in read_output(output)) == sorted(
+        source.key for source in sources
+    )
+
+
+def test_run_corpus(tmp_path: Path) -> None:
+    keys = write_corpus(tmp_path / "corpus")
+    output = tmp_path / "stances.jsonl"
+    timings = run_corpus(str(tmp_path / "corpus"), str(output), workers=2, random_seed=RANDOM_SEED)
+    assert sorted(timings) == keys
+
+    records = {record["game"]: record for record in read_output(output)}
+    assert sorted(records) == keys
+    long_game = records[keys[0]]
+    assert long_game["game_id"] == "long"
+    assert list(long_game["action_stance"]) == ["S1901M", "F1901M", "S1902M", "F1902M"]
+    assert list(long_game["score_stance"]) == ["S1901M", "F1901M", "S1902M", "F1902M"]
+    assert long_game["seconds"] == timings[keys[0]]
+    assert "features" not in long_game
+
+    game = Game()
+    play(game, GAME_ORDERS)
+    trajectory = ActionBasedStance("AUSTRIA", game, random_seed=RANDOM_SEED).stance_trajectory(game)
+    assert long_game["action_stance"] == trajectory
+    assert long_game["score_stance"] == ScoreBasedStance("AUSTRIA", game).stance_trajectory(game)
+
+
+def test_run_corpus_resume(tmp_path: Path) -> None:
+    keys = write_corpus(tmp_path / "corpus")
+    output = tmp_path / "stances.jsonl"
+    run_corpus(str(tmp_path / "corpus"), str(output), workers=1)
+    records = read_output(output)
+
+    # Interrupted while writing the last record
+    with open(output, "w") as file:
+        file.write(json.dumps(records[0]) + "\n" + json.dumps(records[1])[:10])
+    timings = run_corpus(str(tmp_path / "corpus"), str(output), workers=1)
+    assert sorted(timings) == sorted(keys[1:])
+    assert sorted(record["game"] for record in read_output(output)) == keys
+
+    assert run_corpus(str(tmp_path / "corpus"), str(output), workers=1) == {}
+    main([str(tmp_path / "corpus"), str(output), "--workers", "1", "--no-resume"])
+    assert sorted(record["game"] for record in read_output(output)) == keys
+
+
+def test_run_corpus_features(tmp_path: Path) -> None:
+    np = pytest.importorskip("numpy")
+    from stance_vector.features import extract_feature_tensor, load_feature_tensor
+
+    keys = write_corpus(tmp_path / "corpus")
+    output = tmp_path / "stances.jsonl"
+    run_corpus(
+        str(tmp_path / "corpus"), str(output), workers=1, feature_dir=str(tmp_path / "features")
+    )
+    records = {record["game"]: record for record in read_output(output)}
+    tensor = load_feature_tensor(records[keys[0]]["features"])
+
+    game = Game()
+    play(game, GAME_ORDERS)
+    assert np.array_equal(tensor.counts, extract_feature_tensor(game).counts)
+    assert len({record["features"] for record in records.values()}) == 3
@@ -0,0 +1,80 @@
+from typing import Any
+
+from diplomacy import Game
+import pytest
+
+from stance_vector import ActionBasedStance
+
+np = pytest.importorskip("numpy")
+
+from stance_vector.deltas import DeltaIndex, phase_order  # noqa: E402
+from stance_vector.features import extract_feature_tensor  # noqa: E402
+from stance_vector.matrix import to_matrix  # noqa: E402
+from stance_vector.sweep import SweepSetting  # noqa: E402
+
+from .test_action_based_stance import GAME_ORDERS, play  # noqa: E402
+
+
+def linear_trajectory(game: Game, invasion_coef: float, discount_factor: float = 0.5) -> Any:
+    """Stances of ActionBasedStance without its betrayal heuristics, [phases, N, N]."""
+    action_stance = ActionBasedStance(
+        "FRANCE",
+        game,
+        invasion_coef=invasion_coef,
+        discount_factor=discount_factor,
+        end_game_flip=False,
+        random_betrayal=False,
+    )
+    trajectory = action_stance.stance_trajectory(game)
+    return np.stack([to_matrix(stance, action_stance.nations) for stance in trajectory.values()])
+
+
+def test_stance() -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    index = DeltaIndex.from_tensor(extract_feature_tensor(game), SweepSetting(invasion_coef=2.0))
+    assert index.phases == ["S1901M", "F1901M", "S1902M", "F1902M"]
+
+    expected = linear_trajectory(game, invasion_coef=2.0)
+    for t, phase_name in enumerate(index.phases):
+        assert np.allclose(index.stance(phase_name), expected[t])
+        assert np.allclose(index.stance(t), expected[t])
+    assert np.allclose(index.stance(-1), 0.1)
+    assert index.stance_of("FRANCE", "GERMANY", "F1902M") == pytest.approx(
+        expected[3, 2, 3], abs=1e-12
+    )
+
+    # Under another discount factor
+    expected = linear_trajectory(game, invasion_coef=2.0, discount_factor=0.9)
+    assert np.allclose(index.stance("F1902M", discount=0.9), expected[3])
+
+    # The last movement phase before another phase
+    assert index.phase_index("F1901R") == index.phase_index("W1901A") == 1
+    assert index.phase_index("S1901R") == 0
+    assert index.phase_index("S1903M") == 3
+    with pytest.raises(IndexError):
+        index.stance(4)
+
+
+def test_windows() -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    index = DeltaIndex.from_tensor(extract_feature_tensor(game))
+    stances = np.stack([index.stance(t) for t in range(4)])
+
+    window = index.deltas[1] * 0.5**2 + index.deltas[2] * 0.5 + index.deltas[3]
+    assert np.allclose(index.window_stance("F1901M", "F1902M"), window)
+    assert np.allclose(index.window_stance(-1, 3) + 0.5**4 * 0.1, stances[3])
+
+    assert np.allclose(index.mean_stance("F1901M", "S1902M"), stances[1:3].mean(axis=0))
+    assert np.allclose(index.mean_stance(-1, 3), stances.mean(axis=0))
+    with pytest.raises(ValueError):
+        index.mean_stance(2, 1)
+
+    assert np.allclose(index.delta_sum(1, 3), index.deltas[1:].sum(axis=0))
+    assert np.allclose(index.delta_sum(2, 1), 0)
+
+
+def test_phase_order() -> None:
+    phases = ["F1901R", "S1902M", "W1901A", "F1901M", "S1901M"]
+    assert sorted(phases, key=phase_order) == ["S1901M", "F1901M", "F1901R", "W1901A", "S1902M"]
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from diplomacy import Game
+import pytest
+
+from stance_vector import ActionBasedStance
+
+np = pytest.importorskip("numpy")
+
+from stance_vector.features import (  # noqa: E402
+    FEATURE_NAMES,
+    extract_feature_tensor,
+    load_feature_tensor,
+    save_feature_tensor,
+)
+
+from .test_action_based_stance import GAME_ORDERS, play  # noqa: E402
+
+
+def test_extract_feature_tensor() -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    tensor = extract_feature_tensor(game)
+    assert tensor.phases == ["S1901M", "F1901M", "S1902M", "F1902M"]
+    assert tensor.nations == sorted(game.get_map_power_names())
+    assert tensor.counts.shape == (4, 7, 7, len(FEATURE_NAMES))
+
+    # The features are the counts weighted by the coefficients
+    action_stance = ActionBasedStance("FRANCE", game)
+    for p, m_phase_data in enumerate(action_stance.iter_m_snapshots(game)):
+        action_stance.territories = action_stance.extract_terr(m_phase_data)
+        features = action_stance.extract_features(m_phase_data)
+        for i, n in enumerate(tensor.nations):
+            for j, k in enumerate(tensor.nations):
+                hostile_mov, conflict_mov, _, _, friendly_sup, unrealized = tensor.counts[p, i, j]
+                assert features.hostility_to[n][k] == hostile_mov + 0.5 * conflict_mov
+                assert features.friendship_to[n][k] == friendly_sup
+                assert features.friendship_ur_to[n][k] == unrealized
+
+    # In S1902M, England supports France's units in Brest and Picardy
+    friendly_supports = FEATURE_NAMES.index("friendly_supports")
+    france, england = tensor.nations.index("FRANCE"), tensor.nations.index("ENGLAND")
+    assert tensor.counts[2, france, england, friendly_supports] == 2
+
+
+def test_extract_feature_tensor_no_phases() -> None:
+    assert extract_feature_tensor(Game()).counts.shape == (0, 7, 7, len(FEATURE_NAMES))
+
+
+@pytest.mark.parametrize("suffix", [".npz", ".npy"])
+def test_save_feature_tensor(tmp_path: Path, suffix: str) -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    tensor = extract_feature_tensor(game)
+    path = str(tmp_path / f"features{suffix}")
+    save_feature_tensor(tensor, path)
+    loaded = load_feature_tensor(path)
+    assert loaded.phases == tensor.phases and loaded.nations == tensor.nations
+    assert np.array_equal(loaded.counts, tensor.counts)
+    if suffix == ".npy":
+        assert isinstance(loaded.counts, np.memmap)
@@ -0,0 +1,63 @@
+import io
+import json
+
+from diplomacy import Game
+from diplomacy.utils.export import to_saved_game_format
+import pytest
+
+from stance_vector import ActionBasedStance, ScoreBasedStance, game_log
+from stance_vector.game_log import GameLog
+
+from .test_action_based_stance import GAME_ORDERS, RANDOM_SEED, play
+
+
+def saved_game_text() -> str:
+    game = Game(game_id="test")
+    play(game, GAME_ORDERS)
+    return json.dumps(to_saved_game_format(game), indent=1)
+
+
+@pytest.mark.parametrize("read_size", [7, game_log.READ_SIZE])
+def test_game_log(monkeypatch: pytest.MonkeyPatch, read_size: int) -> None:
+    monkeypatch.setattr(game_log, "READ_SIZE", read_size)
+    log = GameLog(io.StringIO(saved_game_text()))
+    assert log.game_id == "test"
+    assert log.map_name == "standard"
+    assert log.get_map_power_names() == list(Game().get_map_power_names())
+
+    game = Game()
+    play(game, GAME_ORDERS)
+    action_stance = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED)
+    snapshots = list(log.iter_m_snapshots())
+    assert snapshots == list(action_stance.iter_m_snapshots(game))
+    assert [snapshot.name for snapshot in snapshots] == ["S1901M", "F1901M", "S1902M", "F1902M"]
+    with pytest.raises(RuntimeError):
+        next(log.iter_m_snapshots())
+
+
+def test_stance_trajectory() -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+
+    log = GameLog(io.StringIO(saved_game_text()))
+    action_stance = ActionBasedStance("FRANCE", log, random_seed=RANDOM_SEED)
+    expected = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED).stance_trajectory(game)
+    assert action_stance.stance_trajectory(log) == expected
+
+    log = GameLog(io.StringIO(saved_game_text()))
+    score_stance = ScoreBasedStance("FRANCE", log)
+    assert score_stance.stance_trajectory(log) == ScoreBasedStance(
+        "FRANCE", game
+    ).stance_trajectory(game)
+
+
+def test_game_log_without_phases() -> None:
+    log = GameLog(io.StringIO('{"id": "empty", "map": "standard"}'))
+    assert list(log.iter_m_snapshots()) == []
+
+
+def test_game_log_map_after_phases() -> None:
+    saved_game = json.loads(saved_game_text())
+    saved_game["map"] = saved_game.pop("map")
+    with pytest.raises(ValueError):
+        GameLog(io.StringIO(json.dumps(saved_game)))
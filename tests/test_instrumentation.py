@@ -0,0 +1,81 @@
+from typing import Any, Dict, List
+
+from diplomacy import Game
+
+from stance_vector import ActionBasedStance, ScoreBasedStance
+from stance_vector.instrumentation import Instrumentation
+
+from .test_action_based_stance import GAME_ORDERS, RANDOM_SEED, play
+
+
+def test_get_stance_stages() -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    calls: List[Dict[str, Any]] = []
+    action_stance = ActionBasedStance("AUSTRIA", game, random_seed=RANDOM_SEED)
+    action_stance.instrumentation = Instrumentation(callback=calls.append)
+
+    stance, _ = action_stance.get_stance(game, verbose=True)
+    assert calls == action_stance.instrumentation.records
+    (record,) = calls
+    assert record["call"] == "get_stance"
+    assert record["phase"] == game.current_short_phase
+    assert record["calls"] == 1
+    assert list(record["stages"]) == [
+        "get_prev_m_phase",
+        "extract_terr",
+        "extract_features",
+        "update",
+        "log",
+    ]
+    for stats in record["stages"].values():
+        assert stats["calls"] == 1
+        assert 0 <= stats["seconds"] <= record["seconds"]
+
+    # The instrumentation does not change the stances
+    expected = ActionBasedStance("AUSTRIA", game, random_seed=RANDOM_SEED).get_stance(game)
+    assert stance == expected
+
+
+def test_incremental_stages() -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    action_stance = ActionBasedStance(
+        "AUSTRIA", game, random_seed=RANDOM_SEED, incremental=True, deepcopy_game=True
+    )
+    instrumentation = Instrumentation(keep=False)
+    action_stance.instrumentation = instrumentation
+    action_stance.get_stance(game)
+    assert instrumentation.records == []
+
+    instrumentation.keep = True
+    action_stance.get_stance(game)
+    action_stance.get_stance(game)
+    exported = instrumentation.as_dict()
+    assert [record["stages"] for record in exported["calls"]] == [{}, {}]
+
+    other = ActionBasedStance("AUSTRIA", game, random_seed=RANDOM_SEED, incremental=True)
+    other.instrumentation = instrumentation
+    other.get_stance(game)
+    stages = instrumentation.records[-1]["stages"]
+    assert stages["update"]["calls"] == 4
+    assert "deepcopy" not in stages
+    totals = instrumentation.as_dict()["totals"]
+    assert totals["update"]["calls"] == 4
+
+
+def test_score_based_stages() -> None:
+    game = Game()
+    score_stance = ScoreBasedStance("FRANCE", game)
+    score_stance.instrumentation = Instrumentation()
+    score_stance.get_stance()
+    (record,) = score_stance.instrumentation.records
+    assert record["phase"] == "S1901M"
+    assert list(record["stages"]) == ["extract_scores", "update"]
+
+
+def test_stage_outside_call() -> None:
+    instrumentation = Instrumentation()
+    with instrumentation.stage("update"):
+        pass
+    assert instrumentation.as_dict() == {"calls": [], "totals": {}}
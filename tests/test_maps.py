@@ -0,0 +1,39 @@
+from collections import OrderedDict
+
+from diplomacy import Game
+import pytest
+
+from stance_vector import ActionBasedStance, maps
+from stance_vector.maps import get_army_moves, get_map_descriptor
+
+
+def test_get_army_moves() -> None:
+    game = Game()
+    army_moves = get_army_moves(game.map)
+    assert army_moves["PAR"] == ("BRE", "BUR", "GAS", "PIC")
+    assert army_moves["NTH"] == ()
+    locs = [loc.upper() for loc in game.map.locs]
+    for army in locs:
+        for loc in locs:
+            assert bool(game.map.abuts("A", army, "-", loc)) == (loc in army_moves[army])
+    # The table is shared by every game on the same map
+    assert get_army_moves(Game().map) is army_moves
+
+
+def test_get_map_descriptor(monkeypatch: pytest.MonkeyPatch) -> None:
+    game = Game()
+    descriptor = get_map_descriptor(game.map)
+    assert descriptor.powers == tuple(sorted(game.get_map_power_names()))
+    assert descriptor.power_index["FRANCE"] == descriptor.powers.index("FRANCE")
+    assert descriptor.locs[descriptor.loc_index["PAR"]] == "PAR"
+    assert descriptor.home_centers["FRANCE"] == ("BRE", "MAR", "PAR")
+    assert descriptor.army_moves is get_army_moves(game.map)
+    assert ActionBasedStance("FRANCE", game).map_descriptor is descriptor
+
+    # The least recently used map is evicted
+    monkeypatch.setattr(maps, "MAP_CACHE_SIZE", 1)
+    monkeypatch.setattr(maps, "_DESCRIPTORS", OrderedDict([("standard", descriptor)]))
+    modern = get_map_descriptor(Game(map_name="modern").map)
+    assert get_map_descriptor(Game(map_name="modern").map) is modern
+    assert get_map_descriptor(game.map) is not descriptor
+    assert get_map_descriptor(game.map) == descriptor
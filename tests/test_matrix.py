@@ -0,0 +1,50 @@
+from typing import Any
+
+from diplomacy import Game
+import pytest
+
+from stance_vector import ActionBasedStance
+
+np = pytest.importorskip("numpy")
+
+from stance_vector.matrix import MatrixView, to_dict, to_matrix  # noqa: E402
+
+from .test_action_based_stance import GAME_ORDERS, RANDOM_SEED, play  # noqa: E402
+
+
+def test_matrix_view() -> None:
+    nations = ["ENGLAND", "FRANCE"]
+    table = {"ENGLAND": {"ENGLAND": 0.0, "FRANCE": 1.0}, "FRANCE": {"ENGLAND": -1.0, "FRANCE": 0.5}}
+    matrix = to_matrix(table, nations)
+    assert matrix.tolist() == [[0.0, 1.0], [-1.0, 0.5]]
+    view = MatrixView(matrix, nations)
+    assert view == table
+    view["FRANCE"]["ENGLAND"] = 2.0
+    assert matrix[1, 0] == 2.0
+    assert to_dict(matrix, nations)["FRANCE"] == {"ENGLAND": 2.0, "FRANCE": 0.5}
+
+
+def test_numpy_engine() -> None:
+    game = Game()
+    dict_stance = ActionBasedStance("FRANCE", game, year_threshold=1901, random_seed=RANDOM_SEED)
+    numpy_stance = ActionBasedStance(
+        "FRANCE", game, year_threshold=1901, random_seed=RANDOM_SEED, numpy_engine=True
+    )
+    for orders in GAME_ORDERS:
+        play(game, [orders])
+        stances, log = dict_stance.get_stance(game, verbose=True)
+        matrix_stances, matrix_log = numpy_stance.get_stance(game, verbose=True)
+        assert matrix_stances == stances
+        assert matrix_log == log
+    assert numpy_stance.stance_matrix is not None
+    assert numpy_stance.stance_matrix.shape == (7, 7)
+    assert numpy_stance.feature_matrices["hostility"][2, 3] == 1.0
+    # The kernel writes the features straight into the arrays
+    features = numpy_stance._last_features
+    assert features is not None
+    hostility_to: Any = features.hostility_to
+    assert isinstance(hostility_to, MatrixView)
+    assert numpy_stance.feature_matrices["hostility"] is hostility_to.matrix
+
+    numpy_stance.update_stance("FRANCE", "ENGLAND", 0.5)
+    assert numpy_stance.stance_matrix[2, 1] == 0.5
@@ -0,0 +1,34 @@
+from stance_vector.orders import ParsedOrder, get_order_table, parse_order, parse_order_record
+
+
+def test_parse_order() -> None:
+    assert parse_order("A PAR H") == ("HOLD", "PAR", "PAR")
+    assert parse_order("A WAL - BEL VIA") == ("MOVE", "WAL", "WAL", "BEL")
+    assert parse_order("A BEL S F PIC") == ("SUPPORT", "BEL", "PIC")
+    assert parse_order("F ENG C A WAL - BEL") == ("CONVOY", "ENG", "WAL", "BEL")
+    assert parse_order("EAT HAM SAND") == ("UNKNOWN", "UNKNOWN", "UNKNOWN")
+
+
+def test_parse_order_record() -> None:
+    assert parse_order_record("F BRE - PIC") == ParsedOrder("MOVE", "F", "BRE", "BRE", "PIC")
+    assert parse_order_record("A BEL S F PIC") == ParsedOrder("SUPPORT", "A", "BEL", "PIC", None)
+    assert parse_order_record("F HEL S A BEL - HOL") == ParsedOrder(
+        "SUPPORT", "F", "HEL", "BEL", "HOL"
+    )
+    assert parse_order_record("EAT HAM SAND") == ParsedOrder(
+        "UNKNOWN", "", "UNKNOWN", "UNKNOWN", None
+    )
+
+
+def test_get_order_table() -> None:
+    orders = {"FRANCE": ["A MAR H", "F BRE - PIC"], "ENGLAND": None}
+    table = get_order_table(orders)
+    assert table == {
+        "FRANCE": (
+            ParsedOrder("HOLD", "A", "MAR", "MAR", None),
+            ParsedOrder("MOVE", "F", "BRE", "BRE", "PIC"),
+        ),
+        "ENGLAND": (),
+    }
+    # The same phase is only parsed once
+    assert get_order_table({"FRANCE": ["A MAR H", "F BRE - PIC"], "ENGLAND": []}) is table
@@ -0,0 +1,43 @@
+import io
+import json
+from typing import Any, Dict
+
+from diplomacy import Game
+from diplomacy.utils.export import to_saved_game_format
+import pytest
+
+from stance_vector import ActionBasedStance, parallel
+from stance_vector.game_log import GameLog
+
+from .test_action_based_stance import GAME_ORDERS, RANDOM_SEED, play
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"year_threshold": 1901, "discount_factor": 0.75},
+        {"ego_only": True, "random_betrayal": False},
+    ],
+)
+def test_parallel_stance_trajectory(
+    monkeypatch: pytest.MonkeyPatch, options: Dict[str, Any]
+) -> None:
+    monkeypatch.setattr(parallel, "BATCH_SIZE", 1)
+    game = Game()
+    play(game, GAME_ORDERS)
+    serial_stance = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED, **options)
+    parallel_stance = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED, **options)
+    expected = serial_stance.stance_trajectory(game)
+    assert parallel_stance.stance_trajectory(game, workers=2) == expected
+    assert parallel_stance.get_log() == serial_stance.get_log()
+    assert parallel_stance.random.getstate() == serial_stance.random.getstate()
+
+
+def test_parallel_stance_trajectory_game_log() -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    expected = ActionBasedStance("FRANCE", game, random_seed=RANDOM_SEED).stance_trajectory(game)
+    game_log = GameLog(io.StringIO(json.dumps(to_saved_game_format(game))))
+    action_stance = ActionBasedStance("FRANCE", game_log, random_seed=RANDOM_SEED)
+    assert action_stance.stance_trajectory(game_log, workers=1) == expected
@@ -88,3 +88,72 @@ def test_game() -> None:
 
     # W1901A
     assert game.get_current_phase() == "W1901A"
+
+
+def test_stance_trajectory() -> None:
+    game = Game()
+    score_stance = ScoreBasedStance("FRANCE", game)
+    sequential = {}
+    for orders in [
+        {"GERMANY": ["A BER - MUN", "A MUN - BUR", "F KIE - HOL"]},
+        {"ENGLAND": ["F LON - NTH"], "GERMANY": ["F HOL H"]},
+        {"GERMANY": ["A MUN B"]},
+        {},
+    ]:
+        phase = game.get_current_phase()
+        if phase.endswith("M"):
+            stances = score_stance.get_stance()
+            sequential[phase] = {n: dict(stances[n]) for n in stances}
+        for power, power_orders in orders.items():
+            game.set_orders(power, power_orders)
+        game.process()
+
+    trajectory = ScoreBasedStance("FRANCE", game).stance_trajectory(game)
+    assert list(trajectory) == ["S1901M", "F1901M", "S1902M"]
+    assert trajectory == sequential
+    assert trajectory["S1902M"]["FRANCE"]["GERMANY"] == -1
+
+
+def test_stance_trajectory_all_phases() -> None:
+    game = Game()
+    score_stance = ScoreBasedStance("FRANCE", game)
+    sequential = {}
+    for orders in [
+        {"GERMANY": ["A BER - MUN", "A MUN - BUR", "F KIE - HOL"]},
+        {"ENGLAND": ["F LON - NTH"], "GERMANY": ["F HOL H"]},
+        {"GERMANY": ["A MUN B"]},
+    ]:
+        stances = score_stance.get_stance()
+        sequential[game.get_current_phase()] = {n: dict(stances[n]) for n in stances}
+        for power, power_orders in orders.items():
+            game.set_orders(power, power_orders)
+        game.process()
+    stances = score_stance.get_stance()
+    sequential[game.get_current_phase()] = {n: dict(stances[n]) for n in stances}
+
+    trajectory = ScoreBasedStance("FRANCE", game).stance_trajectory(game, all_phases=True)
+    assert list(trajectory) == ["S1901M", "F1901M", "W1901A", "S1902M"]
+    assert trajectory == sequential
+
+
+def test_get_stance_unchanged_scores() -> None:
+    game = Game()
+    score_stance = ScoreBasedStance("FRANCE", game)
+    stances = score_stance.get_stance()
+    expected = {n: dict(stances[n]) for n in stances}
+    # Stances are only rewritten for nations whose score changed
+    stances["FRANCE"]["ENGLAND"] = 2
+    assert score_stance.get_stance()["FRANCE"]["ENGLAND"] == 2
+    score_stance.scores["ENGLAND"] = 0
+    assert score_stance.get_stance() == expected
+
+
+def test_save_state() -> None:
+    game = Game()
+    score_stance = ScoreBasedStance("FRANCE", game)
+    score_stance.get_stance()
+    restored_stance = ScoreBasedStance("FRANCE", game)
+    restored_stance.load_state(score_stance.save_state())
+    assert restored_stance.scores == score_stance.scores
+    assert restored_stance.stance == score_stance.stance
+    assert all(type(value) is int for value in restored_stance.stance["RUSSIA"].values())
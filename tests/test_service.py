@@ -0,0 +1,93 @@
+from typing import Any, Dict
+
+from diplomacy import Game
+import pytest
+
+from stance_vector import ActionBasedStance
+from stance_vector.service import OverlayStance, StanceService
+
+from .test_action_based_stance import GAME_ORDERS, RANDOM_SEED, play
+
+
+def as_dict(stance: Any) -> Dict[str, Dict[str, float]]:
+    return {n: dict(stance[n]) for n in stance}
+
+
+@pytest.mark.parametrize("random_betrayal", [True, False])
+def test_power_stance(random_betrayal: bool) -> None:
+    game = Game()
+    service = StanceService(game, year_threshold=1901, random_betrayal=random_betrayal)
+    views = {}
+    expected_stances = {}
+    for i, power in enumerate(["AUSTRIA", "ENGLAND", "FRANCE"]):
+        views[power] = service.view(power, random_seed=RANDOM_SEED + i)
+        expected_stances[power] = ActionBasedStance(
+            power,
+            game,
+            year_threshold=1901,
+            random_betrayal=random_betrayal,
+            random_seed=RANDOM_SEED + i,
+            incremental=True,
+        )
+
+    for phase_orders in GAME_ORDERS:
+        play(game, [phase_orders])
+        for power, view in views.items():
+            if power == "FRANCE" and game.current_short_phase == "F1901M":
+                continue
+            expected = expected_stances[power].get_stance(game)
+            assert as_dict(view.get_stance(game)) == as_dict(expected)
+        views["ENGLAND"].update_stance("ENGLAND", "FRANCE", 2.0)
+        expected_stances["ENGLAND"].update_stance("ENGLAND", "FRANCE", 2.0)
+    assert views["ENGLAND"].stance["ENGLAND"]["FRANCE"] == 2.0
+
+    # The shared stances are computed once per movement phase
+    assert service.model.last_m_phase == "F1902M"
+    assert len(service._updates) == 4
+
+
+def test_power_stance_read_only() -> None:
+    game = Game()
+    service = StanceService(game, random_betrayal=False)
+    view = service.view("FRANCE")
+    play(game, GAME_ORDERS[:1])
+    stance = view.get_stance(game)
+    assert isinstance(stance, OverlayStance)
+    with pytest.raises(TypeError):
+        stance["FRANCE"]["ENGLAND"] = 1.0  # type: ignore[index]
+
+    # Returned stances are not changed by later overrides or phases
+    before = as_dict(stance)
+    view.update_stance("FRANCE", "ENGLAND", 1.0)
+    play(game, GAME_ORDERS[1:2])
+    view.get_stance(game)
+    assert as_dict(stance) == before
+    assert view.overlay == {"FRANCE": {"ENGLAND": view.stance["FRANCE"]["ENGLAND"]}}
+    assert as_dict(service.view("ENGLAND").get_stance(game)) == as_dict(service.model.stance)
+
+
+@pytest.mark.parametrize("random_betrayal", [True, False])
+def test_power_stance_created_mid_game(random_betrayal: bool) -> None:
+    game = Game()
+    service = StanceService(game, random_betrayal=random_betrayal)
+    early_view = service.view("FRANCE", random_seed=RANDOM_SEED)
+    play(game, GAME_ORDERS[:2])
+    early_view.get_stance(game)
+
+    # Created once the service folded in the first phases, as a bot restarted mid-game
+    view = service.view("ENGLAND", random_seed=1)
+    expected_stance = ActionBasedStance(
+        "ENGLAND", game, random_betrayal=random_betrayal, random_seed=1, incremental=True
+    )
+    view.update_stance("ENGLAND", "FRANCE", 2.0)
+    expected_stance.update_stance("ENGLAND", "FRANCE", 2.0)
+    assert as_dict(view.get_stance(game)) == as_dict(expected_stance.get_stance(game))
+    for phase_orders in GAME_ORDERS[2:]:
+        play(game, [phase_orders])
+        expected = expected_stance.get_stance(game)
+        assert as_dict(view.get_stance(game)) == as_dict(expected)
+
+
+def test_stance_service_options() -> None:
+    with pytest.raises(ValueError):
+        StanceService(Game(), incremental=False)
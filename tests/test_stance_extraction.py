@@ -168,3 +168,53 @@ def test_get_stance() -> None:
     stance = StanceTester(my_id, game)
     with pytest.raises(NotImplementedError):
         stance.get_stance(None, None)
+
+
+def test_get_prev_m_snapshot() -> None:
+    game = Game()
+    my_id = "FRANCE"
+    stance = StanceTester(my_id, game)
+    snapshot = stance.get_prev_m_snapshot()
+    assert snapshot.name == "S1901M"
+    assert snapshot.orders["FRANCE"] == []
+    assert snapshot.map is game.map
+
+    game.set_orders("FRANCE", ["A MAR H", "A PAR H", "F BRE - PIC"])
+    game.process()
+    game.process()
+    assert game.get_current_phase() == "S1902M"
+    snapshot = stance.get_prev_m_snapshot()
+    prev_phase = stance.get_prev_m_phase()
+    assert snapshot.name == prev_phase.name == "F1901M"
+    assert snapshot.orders == prev_phase.orders
+    for key in ["units", "retreats", "centers"]:
+        assert snapshot.state[key] == prev_phase.state[key]
+
+
+def test_get_prev_m_phase_cache() -> None:
+    game = Game()
+    my_id = "FRANCE"
+    stance = StanceTester(my_id, game)
+    prev_phase = stance.get_prev_m_phase()
+    assert stance.get_prev_m_phase() is prev_phase
+    assert stance.get_prev_m_snapshot() is stance.get_prev_m_snapshot()
+
+    game.process()
+    new_prev_phase = stance.get_prev_m_phase()
+    assert new_prev_phase is not prev_phase
+    assert new_prev_phase.orders["FRANCE"] == []
+    assert stance.get_prev_m_phase() is new_prev_phase
+
+
+def test_extract_terr_owners() -> None:
+    game = Game()
+    my_id = "FRANCE"
+    stance = StanceTester(my_id, game)
+    game.set_orders("GERMANY", ["A MUN - BUR"])
+    game.process()
+    game.process()
+    territories = stance.extract_terr()
+    assert territories["GERMANY"] == ["BER", "BUR", "KIE", "MUN"]
+    assert territories.owners["BUR"] == ("GERMANY",)
+    assert territories.owners["PAR"] == ("FRANCE",)
+    assert "NTH" not in territories.owners
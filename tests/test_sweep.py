@@ -0,0 +1,74 @@
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+from diplomacy import Game
+import pytest
+
+from stance_vector import ActionBasedStance
+
+np = pytest.importorskip("numpy")
+
+from stance_vector.features import (  # noqa: E402
+    extract_feature_tensor,
+    load_feature_tensor,
+    save_feature_tensor,
+)
+from stance_vector.sweep import SweepSetting, sweep, to_trajectory  # noqa: E402
+
+from .test_action_based_stance import GAME_ORDERS, RANDOM_SEED, play  # noqa: E402
+
+
+def test_sweep() -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    tensor = extract_feature_tensor(game)
+    settings = [
+        SweepSetting(),
+        SweepSetting(invasion_coef=0.5, friendly_coef=2.0, discount_factor=0.75),
+        SweepSetting(conflict_support_coef=0.25, unrealized_coef=0.5, year_threshold=1901),
+    ]
+    stances = sweep(tensor, settings, random_seed=RANDOM_SEED)
+    assert stances.shape == (3, 4, 7, 7)
+    for setting, setting_stances in zip(settings, stances):
+        action_stance = ActionBasedStance(
+            "FRANCE",
+            game,
+            *setting[:-1],
+            year_threshold=setting.year_threshold,
+            random_seed=RANDOM_SEED,
+        )
+        assert to_trajectory(setting_stances, tensor) == action_stance.stance_trajectory(game)
+
+
+def test_sweep_without_betrayals() -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    tensor = extract_feature_tensor(game)
+    stances = sweep(
+        tensor, [SweepSetting(year_threshold=1901)], end_game_flip=False, random_betrayal=False
+    )
+    action_stance = ActionBasedStance("FRANCE", game, end_game_flip=False, random_betrayal=False)
+    assert to_trajectory(stances[0], tensor) == action_stance.stance_trajectory(game)
+
+
+def test_sweep_without_diplomacy(tmp_path: Path) -> None:
+    game = Game()
+    play(game, GAME_ORDERS)
+    path = str(tmp_path / "features.npy")
+    save_feature_tensor(extract_feature_tensor(game), path)
+    script = f"""
+import sys
+import stance_vector
+assert "diplomacy" not in sys.modules
+sys.modules["diplomacy"] = None
+from stance_vector.features import load_feature_tensor
+from stance_vector.sweep import SweepSetting, sweep
+print(sweep(load_feature_tensor({path!r}), [SweepSetting()], random_seed={RANDOM_SEED}).tolist())
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    expected = sweep(load_feature_tensor(path), [SweepSetting()], random_seed=RANDOM_SEED)
+    assert json.loads(result.stdout) == expected.tolist()